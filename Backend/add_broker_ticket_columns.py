@@ -0,0 +1,46 @@
+from app.database import engine
+from sqlalchemy import text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# MT5 source columns on trades and the type each one is added with
+BROKER_COLUMNS = {
+    "broker_ticket": "BIGINT",
+    "broker_account": "VARCHAR",
+    "broker_server": "VARCHAR",
+}
+
+def add_broker_ticket_columns():
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("COMMIT"))  # Ensure no transaction is active
+            
+            for column, column_type in BROKER_COLUMNS.items():
+                # Check if column exists
+                result = connection.execute(text(
+                    f"SELECT column_name FROM information_schema.columns WHERE table_name='trades' AND column_name='{column}'"
+                ))
+                
+                if result.fetchone():
+                    logger.info(f"Column '{column}' already exists.")
+                else:
+                    logger.info(f"Adding '{column}' column to trades table...")
+                    connection.execute(text(f"ALTER TABLE trades ADD COLUMN {column} {column_type}"))
+                    connection.execute(text("COMMIT"))
+                    logger.info(f"Column '{column}' added successfully.")
+            
+            logger.info("Creating unique broker ticket index...")
+            connection.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_trades_broker_ticket "
+                "ON trades (broker_account, broker_server, broker_ticket)"
+            ))
+            connection.execute(text("COMMIT"))
+            logger.info("Broker ticket columns and index are up to date.")
+                
+    except Exception as e:
+        logger.error(f"Error adding columns: {e}")
+
+if __name__ == "__main__":
+    add_broker_ticket_columns()
@@ -0,0 +1,41 @@
+"""
+Add the commission/swap columns used by MT5 position imports.
+"""
+
+from app.database import engine
+from sqlalchemy import text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cost columns on trades and the type each one is added with
+POSITION_COLUMNS = {
+    "commission": "DOUBLE PRECISION DEFAULT 0.0",
+    "swap": "DOUBLE PRECISION DEFAULT 0.0",
+}
+
+def add_position_columns():
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("COMMIT"))  # Ensure no transaction is active
+            
+            for column, column_type in POSITION_COLUMNS.items():
+                # Check if column exists
+                result = connection.execute(text(
+                    f"SELECT column_name FROM information_schema.columns WHERE table_name='trades' AND column_name='{column}'"
+                ))
+                
+                if result.fetchone():
+                    logger.info(f"Column '{column}' already exists.")
+                else:
+                    logger.info(f"Adding '{column}' column to trades table...")
+                    connection.execute(text(f"ALTER TABLE trades ADD COLUMN {column} {column_type}"))
+                    connection.execute(text("COMMIT"))
+                    logger.info(f"Column '{column}' added successfully.")
+                
+    except Exception as e:
+        logger.error(f"Error adding columns: {e}")
+
+if __name__ == "__main__":
+    add_position_columns()
@@ -0,0 +1,50 @@
+"""
+Add the indexes behind the hot trade, user and login-history queries.
+Indexes are built CONCURRENTLY so writes keep flowing; safe to re-run. Check the resulting plans with verify_query_plans.py.
+"""
+
+from app.database import engine
+from sqlalchemy import text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Index name -> definition; names match the model declarations
+ACCESS_INDEXES = {
+    "ix_trades_user_close_time": "trades (user_id, close_time)",
+    "ix_trades_user_open_time": "trades (user_id, open_time)",
+    "ix_trades_close_time": "trades (close_time)",
+    "ix_users_role": "users (role)",
+    "ix_users_created_at": "users (created_at)",
+    "ix_login_history_user_timestamp": "login_history (user_id, timestamp)",
+    "ix_login_history_timestamp": "login_history (timestamp)",
+}
+
+def add_trade_access_indexes():
+    try:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for name, definition in ACCESS_INDEXES.items():
+                # An interrupted concurrent build leaves an INVALID index behind - rebuild it
+                invalid = connection.execute(text(
+                    "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE c.relname = :name AND NOT i.indisvalid"
+                ), {"name": name}).fetchone()
+                if invalid:
+                    logger.info(f"Dropping invalid index '{name}'...")
+                    connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                
+                logger.info(f"Creating index '{name}' on {definition}...")
+                connection.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+            
+            # Fresh statistics so the planner picks the new indexes up right away
+            for table in ("trades", "users", "login_history"):
+                connection.execute(text(f"ANALYZE {table}"))
+            logger.info("Access indexes are up to date.")
+                
+    except Exception as e:
+        logger.error(f"Error adding indexes: {e}")
+
+if __name__ == "__main__":
+    add_trade_access_indexes()
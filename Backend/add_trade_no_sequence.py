@@ -0,0 +1,24 @@
+"""
+Back trades.trade_no with the trade_no_seq sequence (see
+app.crud.trade_no_crud). The app also does this on startup; the script is
+for preparing a database before deploying. Safe to re-run.
+"""
+
+from app.database import engine
+from app.crud.trade_no_crud import sync_trade_no_sequence
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def add_trade_no_sequence():
+    try:
+        logger.info("Creating trade_no_seq and moving it past existing trade numbers...")
+        sync_trade_no_sequence(engine)
+        logger.info("trade_no_seq is up to date.")
+                
+    except Exception as e:
+        logger.error(f"Error adding trade_no sequence: {e}")
+
+if __name__ == "__main__":
+    add_trade_no_sequence()
@@ -0,0 +1,65 @@
+"""
+Add the avg win/loss and streak columns to the user_trade_stats rollup.
+
+winning_net is backfilled from the trades table when it is added; the
+streak columns start out stale and are recomputed per user the first time
+their statistics are read.
+"""
+
+from app.database import engine
+from sqlalchemy import text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rollup columns and the type each one is added with
+STATS_COLUMNS = {
+    "winning_net": "DOUBLE PRECISION NOT NULL DEFAULT 0.0",
+    "max_win_streak": "INTEGER NOT NULL DEFAULT 0",
+    "max_loss_streak": "INTEGER NOT NULL DEFAULT 0",
+    "current_streak": "INTEGER NOT NULL DEFAULT 0",
+    "last_close_time": "TIMESTAMP",
+    "streaks_stale": "BOOLEAN NOT NULL DEFAULT true",
+}
+
+def add_trade_stats_columns():
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("COMMIT"))  # Ensure no transaction is active
+            
+            for column, column_type in STATS_COLUMNS.items():
+                # Check if column exists
+                result = connection.execute(text(
+                    f"SELECT column_name FROM information_schema.columns WHERE table_name='user_trade_stats' AND column_name='{column}'"
+                ))
+                
+                if result.fetchone():
+                    logger.info(f"Column '{column}' already exists.")
+                    continue
+                
+                logger.info(f"Adding '{column}' column to user_trade_stats table...")
+                connection.execute(text(f"ALTER TABLE user_trade_stats ADD COLUMN {column} {column_type}"))
+                
+                if column == "winning_net":
+                    result = connection.execute(text("""
+                        UPDATE user_trade_stats AS s
+                        SET winning_net = t.winning_net
+                        FROM (
+                            SELECT user_id, sum(net_profit) AS winning_net
+                            FROM trades
+                            WHERE net_profit > 0
+                            GROUP BY user_id
+                        ) AS t
+                        WHERE s.user_id = t.user_id
+                    """))
+                    logger.info(f"Backfilled winning_net for {result.rowcount} users.")
+                
+                connection.execute(text("COMMIT"))
+                logger.info(f"Column '{column}' added successfully.")
+                
+    except Exception as e:
+        logger.error(f"Error adding columns: {e}")
+
+if __name__ == "__main__":
+    add_trade_stats_columns()
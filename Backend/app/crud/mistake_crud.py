@@ -0,0 +1,140 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from typing import Any, Dict, List, Optional, Tuple
+from app.models.trade import Trade
+from app.crud.pagination import decode_cursor, encode_cursor, keyset_after
+
+# Defaults written by the Trade model and the MT5 ingest; not real mistakes
+PLACEHOLDER_MISTAKES = ("enter the mistake", "to be analyzed")
+
+# Columns returned for each example trade
+EXAMPLE_COLUMNS = (
+    Trade.id, Trade.trade_no, Trade.symbol, Trade.type, Trade.close_time,
+    Trade.loss_amount, Trade.net_profit, Trade.reason, Trade.mistake,
+)
+
+
+def mistake_key():
+    """Grouping key: trimmed, lower-cased, inner whitespace collapsed"""
+    return func.lower(func.regexp_replace(func.trim(Trade.mistake), r"\s+", " ", "g"))
+
+
+def _mistake_filter(user_id: str, key):
+    return (
+        Trade.user_id == user_id,
+        Trade.mistake.isnot(None),
+        key != "",
+        key.notin_(PLACEHOLDER_MISTAKES),
+    )
+
+
+def _example(row) -> Dict[str, Any]:
+    return {
+        "trade_no": row.trade_no,
+        "symbol": row.symbol,
+        "type": row.type,
+        "close_time": row.close_time,
+        "loss_amount": row.loss_amount or 0.0,
+        "net_profit": row.net_profit,
+        "reason": row.reason,
+        "mistake": row.mistake,
+    }
+
+
+def _cursor_after(examples: List, limit: int) -> Optional[str]:
+    if len(examples) < limit:
+        return None
+    return encode_cursor(examples[-1].close_time, examples[-1].id)
+
+
+def get_mistake_summary(db: Session, user_id: str, examples: int = 3) -> Dict[str, Any]:
+    """
+    Mistake categories for a user, aggregated in the database.
+
+    Trades are grouped by mistake_key(); each category carries its count,
+    summed loss_amount, most recent close_time and its `examples` newest
+    trades (picked with a window function, so one more query in total).
+    A category's next_cursor continues its examples via get_mistake_examples.
+
+    Returns:
+        dict with total_mistakes, total_loss and categories (most frequent first)
+    """
+    key = mistake_key()
+    rows = db.execute(
+        select(
+            key.label("key"),
+            func.min(func.trim(Trade.mistake)).label("name"),
+            func.count().label("count"),
+            func.coalesce(func.sum(Trade.loss_amount), 0.0).label("total_loss"),
+            func.max(Trade.close_time).label("last_occurrence"),
+        )
+        .where(*_mistake_filter(user_id, key))
+        .group_by(key)
+        .order_by(func.count().desc(), func.sum(Trade.loss_amount).desc().nullslast(), key)
+    ).all()
+
+    categories = [
+        {
+            "key": row.key,
+            "name": row.name,
+            "count": row.count,
+            "total_loss": row.total_loss,
+            "last_occurrence": row.last_occurrence,
+            "examples": [],
+            "next_cursor": None,
+        }
+        for row in rows
+    ]
+
+    if categories and examples > 0:
+        ranked = (
+            select(
+                *EXAMPLE_COLUMNS,
+                key.label("key"),
+                func.row_number().over(
+                    partition_by=key,
+                    order_by=(Trade.close_time.desc(), Trade.id.desc())
+                ).label("rank"),
+            )
+            .where(*_mistake_filter(user_id, key))
+            .subquery()
+        )
+        example_rows = db.execute(
+            select(ranked)
+            .where(ranked.c.rank <= examples)
+            .order_by(ranked.c.key, ranked.c.rank)
+        ).all()
+
+        by_key: Dict[str, List] = {}
+        for row in example_rows:
+            by_key.setdefault(row.key, []).append(row)
+        for category in categories:
+            found = by_key.get(category["key"], [])
+            category["examples"] = [_example(row) for row in found]
+            if category["count"] > len(found):
+                category["next_cursor"] = _cursor_after(found, examples)
+
+    return {
+        "total_mistakes": sum(category["count"] for category in categories),
+        "total_loss": sum(category["total_loss"] for category in categories),
+        "categories": categories,
+    }
+
+
+def get_mistake_examples(db: Session, user_id: str, category: str, cursor: Optional[str] = None,
+                         limit: int = 20) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of a category's trades, newest first.
+    `category` is a key from get_mistake_summary (normalized the same way here).
+    Returns (examples, next_cursor). Raises ValueError for a malformed cursor.
+    """
+    key = mistake_key()
+    query = select(*EXAMPLE_COLUMNS).where(
+        *_mistake_filter(user_id, key),
+        key == " ".join(category.split()).lower(),
+    )
+    if cursor:
+        query = query.where(keyset_after(Trade.close_time, Trade.id, decode_cursor(cursor)))
+
+    rows = db.execute(query.order_by(Trade.close_time.desc(), Trade.id.desc()).limit(limit)).all()
+    return [_example(row) for row in rows], _cursor_after(rows, limit)
@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.models.mt5_credentials import MT5Credentials as MT5CredentialsModel
+from app.models.mt5_sync_state import MT5SyncState
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
 
 def create_mt5_credentials(db: Session, credentials_data: dict):
     credentials = MT5CredentialsModel(**credentials_data)
@@ -29,4 +32,51 @@ def delete_mt5_credentials(db: Session, user_id: str):
     if credentials:
         db.delete(credentials)
         db.commit()
-    return credentials
\ No newline at end of file
+    return credentials
+
+# ------------------- Sync State -------------------
+def get_sync_state(db: Session, credentials: MT5CredentialsModel) -> Optional[MT5SyncState]:
+    """Watermark for the credentials' current account, or None if never synced"""
+    state = db.get(MT5SyncState, credentials.id)
+    if state and state.account == str(credentials.account) and state.server == credentials.server:
+        return state
+    return None
+
+def get_sync_start(db: Session, credentials: MT5CredentialsModel, overlap: timedelta,
+                   full_resync: bool = False) -> Optional[datetime]:
+    """
+    Start of the deal window for the next sync: the watermark minus an overlap,
+    or None when a full history fetch is needed.
+    """
+    if full_resync:
+        return None
+    state = get_sync_state(db, credentials)
+    if not state or not state.last_deal_time:
+        return None
+    return state.last_deal_time - overlap
+
+def update_sync_state(db: Session, credentials: MT5CredentialsModel, resume_point: Optional[Tuple[datetime, int]]):
+    """
+    Move the watermark to the (time, ticket) the next sync should resume from:
+    the newest fetched deal, or the first deal of the oldest position still open.
+    """
+    state = db.get(MT5SyncState, credentials.id)
+    if state is None:
+        state = MT5SyncState(credentials_id=credentials.id)
+        db.add(state)
+    elif state.account != str(credentials.account) or state.server != credentials.server:
+        # Credentials now point at a different account - start over
+        state.last_deal_time = None
+        state.last_deal_ticket = None
+    
+    state.account = str(credentials.account)
+    state.server = credentials.server
+    
+    if resume_point is not None:
+        # May move backwards while a position opened earlier is still open
+        state.last_deal_time, state.last_deal_ticket = resume_point
+    
+    state.last_synced_at = datetime.now()
+    db.commit()
+    return state
+
@@ -0,0 +1,64 @@
+from sqlalchemy import and_, or_
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+import base64
+import json
+
+# Keyset (cursor) pagination over (sort timestamp DESC, id DESC).
+# A cursor is the opaque, URL-safe encoding of the last row's key; the next
+# page is every row strictly after it, read straight off an index on the
+# timestamp, so deep pages cost the same as the first one.
+
+
+def encode_key(*values) -> str:
+    """Opaque cursor for any JSON-serializable sort key"""
+    payload = json.dumps(list(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_key(cursor: str, size: int) -> List[Any]:
+    """Raises ValueError for a cursor that was not produced by encode_key with `size` values"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def encode_cursor(sort_value: Optional[datetime], row_id: int) -> str:
+    return encode_key(sort_value.isoformat() if sort_value else None, row_id)
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Raises ValueError for a cursor that was not produced by encode_cursor"""
+    sort_value, row_id = decode_key(cursor, 2)
+    try:
+        return (datetime.fromisoformat(sort_value) if sort_value else None), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_after(sort_column, id_column, cursor: Tuple[Any, Any]):
+    """
+    Filter for the rows after `cursor` in ORDER BY sort_column DESC, id_column DESC
+    (PostgreSQL puts NULL sort values first in that order).
+    """
+    sort_value, row_id = cursor
+    if sort_value is None:
+        return or_(and_(sort_column.is_(None), id_column < row_id), sort_column.isnot(None))
+    # The redundant <= bound lets the planner range-scan the timestamp index
+    return and_(
+        sort_column <= sort_value,
+        or_(sort_column < sort_value, id_column < row_id)
+    )
+
+
+def next_cursor(rows, limit: int, sort_attr: str, id_attr: str = "id") -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this was the last page"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(getattr(last, sort_attr), getattr(last, id_attr))
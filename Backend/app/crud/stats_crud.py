@@ -0,0 +1,525 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, insert, select, event, and_, or_
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from itertools import groupby
+from app.models.trade import Trade
+from app.models.user import User
+from app.models.user_trade_stats import UserTradeStats
+from app.models.user_daily_stats import UserDailyStats
+from app.services.cache_service import leaderboard_cache, activity_cache
+from app.services.activity_service import BUCKETS, bucket_start
+from app.crud.pagination import decode_key, encode_key, keyset_after
+
+# ------------------- Rollup Maintenance -------------------
+# These helpers never commit: they run inside the caller's transaction so the
+# rollups and the trades table always change together. Caches built on the
+# rollups are invalidated once that transaction commits.
+
+STATS_CHANGED = "trade_stats_changed"
+# close_times of the trades added/removed in the transaction, or ALL_ACTIVITY
+# when they are not known
+ACTIVITY_CHANGED = "trade_activity_changed"
+ALL_ACTIVITY = "all"
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stats_caches(session):
+    if session.info.pop(STATS_CHANGED, False):
+        leaderboard_cache.invalidate()
+    changed = session.info.pop(ACTIVITY_CHANGED, None)
+    if changed == ALL_ACTIVITY:
+        activity_cache.invalidate()
+    elif changed:
+        for key in {(bucket, bucket_start(moment, bucket)) for moment in changed for bucket in BUCKETS}:
+            activity_cache.delete(key)
+
+def _activity_changed(db: Session, close_times: Iterable[Optional[datetime]]):
+    """Remember which activity buckets to evict when the transaction commits"""
+    changed = db.info.setdefault(ACTIVITY_CHANGED, set())
+    if changed != ALL_ACTIVITY:
+        changed.update(moment for moment in close_times if moment is not None)
+
+def record_trade(db: Session, user_id: str, close_time: Optional[datetime],
+                 net_profit: float, profit_amount: float, loss_amount: float):
+    """Add a single trade's result to the user's all-time and daily rollup rows"""
+    record_trades(db, [(user_id, close_time, net_profit, profit_amount, loss_amount)])
+
+def record_trades(db: Session, trades: Iterable[tuple]):
+    """
+    Add many trades to the rollups at once.
+    Each item is (user_id, close_time, net_profit, profit_amount, loss_amount); deltas
+    are combined first, so a batch costs one upsert per user and per trading day.
+    """
+    totals: Dict[str, _Delta] = {}
+    daily: Dict[tuple, _Delta] = {}
+
+    for user_id, close_time, net_profit, profit_amount, loss_amount in trades:
+        net_profit = net_profit or 0.0
+        profit_amount = profit_amount or 0.0
+        loss_amount = loss_amount or 0.0
+        totals.setdefault(user_id, _Delta()).add(net_profit, profit_amount, loss_amount, close_time)
+        if close_time is not None:
+            daily.setdefault((user_id, close_time.date()), _Delta()).add(net_profit, profit_amount, loss_amount)
+
+    if not totals:
+        return
+    db.info[STATS_CHANGED] = True
+    _activity_changed(db, (close_time for delta in totals.values() for close_time, _ in delta.outcomes))
+
+    for user_id, delta in totals.items():
+        runs = _Runs(delta.outcomes) if delta.outcomes else None
+        _upsert(
+            db,
+            UserTradeStats,
+            {UserTradeStats.user_id: user_id},
+            {
+                UserTradeStats.total_trades: UserTradeStats.total_trades + delta.count,
+                UserTradeStats.winning_trades: UserTradeStats.winning_trades + delta.wins,
+                UserTradeStats.losing_trades: UserTradeStats.losing_trades + (delta.count - delta.wins),
+                UserTradeStats.total_profit: UserTradeStats.total_profit + delta.profit,
+                UserTradeStats.total_loss: UserTradeStats.total_loss + delta.loss,
+                UserTradeStats.net_profit: UserTradeStats.net_profit + delta.net,
+                UserTradeStats.winning_net: UserTradeStats.winning_net + delta.winning_net,
+                UserTradeStats.best_trade: _greatest(UserTradeStats.best_trade, delta.best),
+                UserTradeStats.worst_trade: _least(UserTradeStats.worst_trade, delta.worst),
+                UserTradeStats.updated_at: datetime.utcnow(),
+                **(_streak_updates(runs) if runs else {}),
+            },
+            lambda: UserTradeStats(
+                user_id=user_id,
+                total_trades=delta.count,
+                winning_trades=delta.wins,
+                losing_trades=delta.count - delta.wins,
+                total_profit=delta.profit,
+                total_loss=delta.loss,
+                net_profit=delta.net,
+                winning_net=delta.winning_net,
+                best_trade=delta.best,
+                worst_trade=delta.worst,
+                max_win_streak=runs.max_win if runs else 0,
+                max_loss_streak=runs.max_loss if runs else 0,
+                current_streak=runs.current if runs else 0,
+                last_close_time=runs.last_close if runs else None,
+                streaks_stale=False,
+            )
+        )
+
+    for (user_id, trade_date), delta in daily.items():
+        _upsert(
+            db,
+            UserDailyStats,
+            {UserDailyStats.user_id: user_id, UserDailyStats.trade_date: trade_date},
+            {
+                UserDailyStats.total_trades: UserDailyStats.total_trades + delta.count,
+                UserDailyStats.winning_trades: UserDailyStats.winning_trades + delta.wins,
+                UserDailyStats.gross_profit: UserDailyStats.gross_profit + delta.profit,
+                UserDailyStats.gross_loss: UserDailyStats.gross_loss + delta.loss,
+                UserDailyStats.net_profit: UserDailyStats.net_profit + delta.net,
+                UserDailyStats.best_trade: _greatest(UserDailyStats.best_trade, delta.best),
+                UserDailyStats.worst_trade: _least(UserDailyStats.worst_trade, delta.worst),
+            },
+            lambda: UserDailyStats(
+                user_id=user_id,
+                trade_date=trade_date,
+                total_trades=delta.count,
+                winning_trades=delta.wins,
+                gross_profit=delta.profit,
+                gross_loss=delta.loss,
+                net_profit=delta.net,
+                best_trade=delta.best,
+                worst_trade=delta.worst,
+            )
+        )
+
+def remove_trade(db: Session, user_id: str, close_time: Optional[datetime],
+                 net_profit: float, profit_amount: float, loss_amount: float) -> bool:
+    """
+    Subtract a trade's result from the user's rollup rows.
+    Must be called after the trade row itself has been deleted/changed and flushed.
+    Returns True when the rows had to be recomputed from the trades table.
+    """
+    db.info[STATS_CHANGED] = True
+    _activity_changed(db, [close_time])
+    net_profit = net_profit or 0.0
+    profit_amount = profit_amount or 0.0
+    loss_amount = loss_amount or 0.0
+    is_win = 1 if net_profit > 0 else 0
+
+    stats = db.query(UserTradeStats).filter(
+        UserTradeStats.user_id == user_id
+    ).with_for_update().populate_existing().first()
+
+    daily = None
+    if close_time is not None:
+        daily = db.query(UserDailyStats).filter(
+            UserDailyStats.user_id == user_id,
+            UserDailyStats.trade_date == close_time.date()
+        ).with_for_update().populate_existing().first()
+
+    # Best/worst cannot be decremented - recompute if the removed trade held one
+    if _needs_refresh(stats, net_profit) or (close_time is not None and _needs_refresh(daily, net_profit)):
+        refresh_user_stats(db, user_id)
+        if close_time is not None:
+            refresh_daily_stats(db, user_id, close_time.date())
+        return True
+
+    stats.total_trades -= 1
+    stats.winning_trades -= is_win
+    stats.losing_trades -= 1 - is_win
+    stats.total_profit -= profit_amount
+    stats.total_loss -= loss_amount
+    stats.net_profit -= net_profit
+    stats.winning_net -= net_profit if is_win else 0.0
+    stats.updated_at = datetime.utcnow()
+    if close_time is not None:
+        # A removed trade can split or shorten any streak
+        stats.streaks_stale = True
+
+    if daily is not None:
+        daily.total_trades -= 1
+        daily.winning_trades -= is_win
+        daily.gross_profit -= profit_amount
+        daily.gross_loss -= loss_amount
+        daily.net_profit -= net_profit
+
+    db.flush()
+    return False
+
+def update_trade_stats(db: Session, user_id: str, old_values: tuple, new_values: tuple):
+    """
+    Move an edited trade from its old (close_time, net, profit, loss) to its new values.
+    Must be called after the edit has been flushed.
+    """
+    if not remove_trade(db, user_id, *old_values):
+        record_trade(db, user_id, *new_values)
+        return
+
+    # The refresh already picked up the new values, but only for the old trading day
+    old_close, new_close = old_values[0], new_values[0]
+    if new_close is not None and (old_close is None or old_close.date() != new_close.date()):
+        refresh_daily_stats(db, user_id, new_close.date())
+
+def refresh_user_stats(db: Session, user_id: str):
+    """Recompute one user's all-time rollup row from the trades table"""
+    db.info[STATS_CHANGED] = True
+    row = db.execute(
+        _stats_select().where(Trade.user_id == user_id).group_by(Trade.user_id)
+    ).first()
+
+    stats = db.get(UserTradeStats, user_id)
+    if stats is None:
+        stats = UserTradeStats(user_id=user_id)
+        db.add(stats)
+
+    stats.total_trades = row.total_trades if row else 0
+    stats.winning_trades = row.winning_trades if row else 0
+    stats.losing_trades = row.losing_trades if row else 0
+    stats.total_profit = row.total_profit if row else 0.0
+    stats.total_loss = row.total_loss if row else 0.0
+    stats.net_profit = row.net_profit if row else 0.0
+    stats.winning_net = row.winning_net if row else 0.0
+    stats.best_trade = row.best_trade if row else None
+    stats.worst_trade = row.worst_trade if row else None
+    stats.updated_at = datetime.utcnow()
+    _recompute_streaks(db, stats)
+    db.flush()
+    return stats
+
+def refresh_stale_streaks(db: Session, user_id: str) -> Optional[UserTradeStats]:
+    """
+    Return the user's rollup row with up-to-date streaks, recomputing them
+    first if a late or removed trade marked them stale. Does not commit.
+    """
+    stats = db.get(UserTradeStats, user_id)
+    if stats is None or not stats.streaks_stale:
+        return stats
+
+    # Lock the row so a concurrent in-order append waits for the recomputed values
+    stats = db.query(UserTradeStats).filter(
+        UserTradeStats.user_id == user_id
+    ).with_for_update().populate_existing().first()
+    if stats.streaks_stale:
+        _recompute_streaks(db, stats)
+        db.flush()
+    return stats
+
+def refresh_daily_stats(db: Session, user_id: str, trade_date: date):
+    """Recompute one user's rollup row for a single trading day"""
+    db.info[STATS_CHANGED] = True
+    day_start = datetime.combine(trade_date, datetime.min.time())
+    row = db.execute(
+        _daily_select().where(
+            Trade.user_id == user_id,
+            Trade.close_time >= day_start,
+            Trade.close_time < day_start + timedelta(days=1)
+        ).group_by(Trade.user_id)
+    ).first()
+
+    daily = db.get(UserDailyStats, (user_id, trade_date))
+    if row is None:
+        if daily is not None:
+            db.delete(daily)
+            db.flush()
+        return None
+
+    if daily is None:
+        daily = UserDailyStats(user_id=user_id, trade_date=trade_date)
+        db.add(daily)
+
+    daily.total_trades = row.total_trades
+    daily.winning_trades = row.winning_trades
+    daily.gross_profit = row.gross_profit
+    daily.gross_loss = row.gross_loss
+    daily.net_profit = row.net_profit
+    daily.best_trade = row.best_trade
+    daily.worst_trade = row.worst_trade
+    db.flush()
+    return daily
+
+def rebuild_all_stats(db: Session) -> int:
+    """Rebuild both rollup tables from trades, repairing any drift. Commits."""
+    db.info[STATS_CHANGED] = True
+    db.info[ACTIVITY_CHANGED] = ALL_ACTIVITY
+    db.query(UserTradeStats).delete(synchronize_session=False)
+    db.query(UserDailyStats).delete(synchronize_session=False)
+
+    # Streak columns take their defaults (stale) and are recomputed per user on first read
+    result = db.execute(
+        insert(UserTradeStats).from_select(
+            ["user_id", "total_trades", "winning_trades", "losing_trades",
+             "total_profit", "total_loss", "net_profit", "winning_net", "best_trade", "worst_trade"],
+            _stats_select().where(Trade.user_id.isnot(None)).group_by(Trade.user_id)
+        )
+    )
+
+    trade_date = func.date(Trade.close_time)
+    db.execute(
+        insert(UserDailyStats).from_select(
+            ["user_id", "trade_date", "total_trades", "winning_trades",
+             "gross_profit", "gross_loss", "net_profit", "best_trade", "worst_trade"],
+            _daily_select(trade_date).where(
+                Trade.user_id.isnot(None),
+                Trade.close_time.isnot(None)
+            ).group_by(Trade.user_id, trade_date)
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+# ------------------- Internal Helpers -------------------
+class _Delta:
+    """Combined effect of several trades on one rollup row"""
+
+    def __init__(self):
+        self.count = 0
+        self.wins = 0
+        self.profit = 0.0
+        self.loss = 0.0
+        self.net = 0.0
+        self.winning_net = 0.0
+        self.best = None
+        self.worst = None
+        self.outcomes = []
+
+    def add(self, net_profit: float, profit_amount: float, loss_amount: float,
+            close_time: Optional[datetime] = None):
+        self.count += 1
+        self.wins += 1 if net_profit > 0 else 0
+        self.profit += profit_amount
+        self.loss += loss_amount
+        self.net += net_profit
+        self.winning_net += net_profit if net_profit > 0 else 0.0
+        if close_time is not None:
+            self.outcomes.append((close_time, net_profit > 0))
+        self.best = net_profit if self.best is None else max(self.best, net_profit)
+        self.worst = net_profit if self.worst is None else min(self.worst, net_profit)
+
+class _Runs:
+    """Win/loss runs of a batch of trades, in close_time order"""
+
+    def __init__(self, outcomes: List[tuple]):
+        outcomes = sorted(outcomes, key=lambda outcome: outcome[0])
+        runs = [(win, len(list(group))) for win, group in groupby(win for _, win in outcomes)]
+        self.first_close = outcomes[0][0]
+        self.last_close = outcomes[-1][0]
+        self.leading_win, self.leading = runs[0]
+        self.uniform = len(runs) == 1
+        self.max_win = max((length for win, length in runs if win), default=0)
+        self.max_loss = max((length for win, length in runs if not win), default=0)
+        trailing_win, trailing = runs[-1]
+        self.current = trailing if trailing_win else -trailing
+
+def _streak_updates(runs: _Runs) -> dict:
+    """
+    In-place streak update for a batch closing at or after the stored
+    last_close_time: the batch's leading run continues the current streak.
+    Anything else only marks the streaks stale.
+    """
+    current = UserTradeStats.current_streak
+    in_order = and_(
+        UserTradeStats.streaks_stale.is_(False),
+        or_(UserTradeStats.last_close_time.is_(None), UserTradeStats.last_close_time <= runs.first_close)
+    )
+    continues = (current > 0) if runs.leading_win else (current < 0)
+    joined = case((continues, func.abs(current) + runs.leading), else_=runs.leading)
+    if runs.uniform:
+        new_current = joined if runs.leading_win else -joined
+    else:
+        new_current = runs.current
+    max_win = func.greatest(UserTradeStats.max_win_streak, runs.max_win, joined if runs.leading_win else 0)
+    max_loss = func.greatest(UserTradeStats.max_loss_streak, runs.max_loss, 0 if runs.leading_win else joined)
+
+    return {
+        UserTradeStats.max_win_streak: case((in_order, max_win), else_=UserTradeStats.max_win_streak),
+        UserTradeStats.max_loss_streak: case((in_order, max_loss), else_=UserTradeStats.max_loss_streak),
+        UserTradeStats.current_streak: case((in_order, new_current), else_=current),
+        UserTradeStats.streaks_stale: case((in_order, False), else_=True),
+        UserTradeStats.last_close_time: _greatest(UserTradeStats.last_close_time, runs.last_close),
+    }
+
+def _recompute_streaks(db: Session, stats: UserTradeStats):
+    """Streak columns from the user's trades (gaps-and-islands over close_time, id)"""
+    win = func.coalesce(Trade.net_profit, 0.0) > 0
+    order = (Trade.close_time, Trade.id)
+    ordered = select(
+        win.label("win"),
+        Trade.close_time,
+        func.row_number().over(order_by=order).label("position"),
+        (func.row_number().over(order_by=order)
+         - func.row_number().over(partition_by=win, order_by=order)).label("run"),
+    ).where(Trade.user_id == stats.user_id, Trade.close_time.isnot(None)).subquery()
+
+    runs = select(
+        ordered.c.win,
+        func.count().label("length"),
+        func.max(ordered.c.position).label("last_position"),
+        func.max(ordered.c.close_time).label("last_close"),
+    ).group_by(ordered.c.win, ordered.c.run).subquery()
+
+    longest = db.execute(select(
+        func.coalesce(func.max(case((runs.c.win, runs.c.length))), 0).label("max_win"),
+        func.coalesce(func.max(case((~runs.c.win, runs.c.length))), 0).label("max_loss"),
+    )).first()
+    last = db.execute(
+        select(runs.c.win, runs.c.length, runs.c.last_close).order_by(runs.c.last_position.desc()).limit(1)
+    ).first()
+
+    stats.max_win_streak = longest.max_win
+    stats.max_loss_streak = longest.max_loss
+    stats.current_streak = (last.length if last.win else -last.length) if last else 0
+    stats.last_close_time = last.last_close if last else None
+    stats.streaks_stale = False
+
+def _upsert(db: Session, model, key: dict, values: dict, new_row):
+    """Atomic in-place increment; create the row if it does not exist yet"""
+    query = db.query(model).filter(*(column == value for column, value in key.items()))
+    if query.update(values, synchronize_session=False):
+        return
+
+    try:
+        with db.begin_nested():
+            db.add(new_row())
+    except IntegrityError:
+        # Another transaction created the row first - apply as an update
+        query.update(values, synchronize_session=False)
+
+def _greatest(column, value):
+    return case((column.is_(None) | (column < value), value), else_=column)
+
+def _least(column, value):
+    return case((column.is_(None) | (column > value), value), else_=column)
+
+def _needs_refresh(row, net_profit: float) -> bool:
+    return row is None or row.total_trades <= 1 or net_profit in (row.best_trade, row.worst_trade)
+
+def _stats_select():
+    """Aggregate columns matching the UserTradeStats layout"""
+    return select(
+        Trade.user_id,
+        func.count(Trade.id).label("total_trades"),
+        func.coalesce(func.sum(case((Trade.net_profit > 0, 1), else_=0)), 0).label("winning_trades"),
+        func.coalesce(func.sum(case((Trade.net_profit > 0, 0), else_=1)), 0).label("losing_trades"),
+        func.coalesce(func.sum(Trade.profit_amount), 0.0).label("total_profit"),
+        func.coalesce(func.sum(Trade.loss_amount), 0.0).label("total_loss"),
+        func.coalesce(func.sum(Trade.net_profit), 0.0).label("net_profit"),
+        func.coalesce(func.sum(case((Trade.net_profit > 0, Trade.net_profit), else_=0.0)), 0.0).label("winning_net"),
+        func.max(Trade.net_profit).label("best_trade"),
+        func.min(Trade.net_profit).label("worst_trade"),
+    )
+
+def _daily_select(*leading_columns):
+    """Aggregate columns matching the UserDailyStats layout"""
+    return select(
+        Trade.user_id,
+        *leading_columns,
+        func.count(Trade.id).label("total_trades"),
+        func.coalesce(func.sum(case((Trade.net_profit > 0, 1), else_=0)), 0).label("winning_trades"),
+        func.coalesce(func.sum(Trade.profit_amount), 0.0).label("gross_profit"),
+        func.coalesce(func.sum(Trade.loss_amount), 0.0).label("gross_loss"),
+        func.coalesce(func.sum(Trade.net_profit), 0.0).label("net_profit"),
+        func.max(Trade.net_profit).label("best_trade"),
+        func.min(Trade.net_profit).label("worst_trade"),
+    )
+
+# ------------------- Rollup Queries -------------------
+def get_user_stats(db: Session, user_id: str):
+    return db.get(UserTradeStats, user_id)
+
+# ------------------- Per-User Performance -------------------
+PERFORMANCE_SORT_COLUMNS = ("trade_count", "avg_profit", "avg_loss", "avg_net")
+
+def get_user_performance_page(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                              symbol: Optional[str] = None, sort_by: str = "trade_count",
+                              cursor: Optional[str] = None, limit: int = 100) -> Tuple[List, Optional[str]]:
+    """
+    Trade count and average profit/loss per non-admin user, highest `sort_by` first.
+
+    Without filters the averages come straight from the user_trade_stats
+    rollup; with a close_time range or symbol they are one GROUP BY over the
+    matching trades (HAVING count > 0). Either way sorting and keyset paging
+    (on sort value, user_id) happen in SQL.
+    Returns (rows, next_cursor). Raises ValueError for a malformed cursor.
+    """
+    if start is None and end is None and symbol is None:
+        count = UserTradeStats.total_trades
+        aggregate = select(
+            UserTradeStats.user_id,
+            count.label("trade_count"),
+            (UserTradeStats.total_profit / count).label("avg_profit"),
+            (UserTradeStats.total_loss / count).label("avg_loss"),
+        ).where(count > 0)
+    else:
+        count = func.count(Trade.id)
+        aggregate = select(
+            Trade.user_id,
+            count.label("trade_count"),
+            func.avg(func.coalesce(Trade.profit_amount, 0.0)).label("avg_profit"),
+            func.avg(func.coalesce(Trade.loss_amount, 0.0)).label("avg_loss"),
+        )
+        if start is not None:
+            aggregate = aggregate.where(Trade.close_time >= start)
+        if end is not None:
+            aggregate = aggregate.where(Trade.close_time <= end)
+        if symbol is not None:
+            aggregate = aggregate.where(Trade.symbol == symbol)
+        aggregate = aggregate.group_by(Trade.user_id).having(count > 0)
+
+    performance = aggregate.subquery()
+    avg_net = (performance.c.avg_profit - performance.c.avg_loss).label("avg_net")
+    sort_column = avg_net if sort_by == "avg_net" else performance.c[sort_by]
+
+    query = select(
+        User.user_id, User.first_name, User.last_name, User.email,
+        performance.c.trade_count, performance.c.avg_profit, performance.c.avg_loss, avg_net,
+    ).join(performance, performance.c.user_id == User.user_id).where(User.role != "admin")
+    if cursor:
+        query = query.where(keyset_after(sort_column, User.user_id, decode_key(cursor, 2)))
+
+    rows = db.execute(
+        query.order_by(sort_column.desc(), User.user_id.desc()).limit(limit)
+    ).all()
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_key(getattr(rows[-1], sort_by), rows[-1].user_id)
+    return rows, next_cursor
@@ -1,6 +1,10 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from datetime import datetime
+from typing import List, Optional, Tuple
 from app.models.trade import Trade
+from app.crud.stats_crud import record_trade, remove_trade
+from app.crud.trade_no_crud import allocate_trade_no
+from app.crud.pagination import decode_cursor, keyset_after, next_cursor
 
 def create_trade(db: Session, trade_data: dict):
     # Calculate net profit
@@ -8,34 +12,85 @@ def create_trade(db: Session, trade_data: dict):
     
     # Auto-generate trade_no if not provided
     if 'trade_no' not in trade_data or trade_data['trade_no'] is None:
-        # Get the maximum trade_no and increment
-        max_trade_no = db.query(func.max(Trade.trade_no)).scalar()
-        trade_data['trade_no'] = (max_trade_no or 0) + 1
+        trade_data['trade_no'] = allocate_trade_no(db)
     
     trade = Trade(**trade_data)
     db.add(trade)
+    db.flush()
+    # Keep the per-user rollup in the same transaction
+    record_trade(db, trade.user_id, trade.close_time, trade.net_profit, trade.profit_amount, trade.loss_amount)
     db.commit()
     db.refresh(trade)
     return trade
 
 def get_trades(db: Session, user_id: str, skip: int = 0, limit: int = 100):
-    return db.query(Trade).filter(Trade.user_id == user_id).offset(skip).limit(limit).all()
+    return get_trades_page(db, user_id=user_id, skip=skip, limit=limit)[0]
+
+def get_trades_page(db: Session, user_id: Optional[str] = None, cursor: Optional[str] = None,
+                    skip: int = 0, limit: int = 100,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[List[Trade], Optional[str]]:
+    """
+    One page of trades, newest close_time first (ties broken by id).
+
+    With a cursor (the next_cursor of the previous page) the page is read by
+    keyset and skip is ignored; otherwise skip/limit offset paging applies.
+    Returns (trades, next_cursor). Raises ValueError for a malformed cursor.
+    """
+    query = db.query(Trade)
+    if user_id:
+        query = query.filter(Trade.user_id == user_id)
+    if start:
+        query = query.filter(Trade.close_time >= start)
+    if end:
+        query = query.filter(Trade.close_time <= end)
+    
+    if cursor:
+        query = query.filter(keyset_after(Trade.close_time, Trade.id, decode_cursor(cursor)))
+    elif skip:
+        query = query.offset(skip)
+    
+    trades = query.order_by(Trade.close_time.desc(), Trade.id.desc()).limit(limit).all()
+    return trades, next_cursor(trades, limit, "close_time")
+
+def get_latest_opened_trade(db: Session, user_id: str):
+    return db.query(Trade).filter(Trade.user_id == user_id).order_by(Trade.open_time.desc()).first()
 
 def get_trade_by_trade_no(db: Session, trade_no: int):
     return db.query(Trade).filter(Trade.trade_no == trade_no).first()
 
+def get_trade_by_ticket(db: Session, ticket: int, account: str, server: str):
+    return db.query(Trade).filter(
+        Trade.broker_account == account,
+        Trade.broker_server == server,
+        Trade.broker_ticket == ticket
+    ).first()
+
+def get_existing_tickets(db: Session, tickets: list, account: str, server: str) -> set:
+    """Which of the given broker tickets are already stored for an MT5 account"""
+    if not tickets:
+        return set()
+    rows = db.query(Trade.broker_ticket).filter(
+        Trade.broker_account == account,
+        Trade.broker_server == server,
+        Trade.broker_ticket.in_(tickets)
+    )
+    return {ticket for (ticket,) in rows}
+
 def delete_trade(db: Session, trade_no: int):
     trade = get_trade_by_trade_no(db, trade_no)
     if trade:
         db.delete(trade)
+        db.flush()
+        remove_trade(db, trade.user_id, trade.close_time, trade.net_profit, trade.profit_amount, trade.loss_amount)
         db.commit()
     return trade
 
 def update_trade_reason(db: Session, trade_no: int, reason: str, mistake: str):
+    # Reason/mistake do not feed the stats rollup, so no rollup delta is needed
     trade = get_trade_by_trade_no(db, trade_no)
     if trade:
         trade.reason = reason
         trade.mistake = mistake
         db.commit()
         db.refresh(trade)
-    return trade
\ No newline at end of file
+    return trade
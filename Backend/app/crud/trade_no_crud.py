@@ -0,0 +1,58 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, text
+from typing import List
+import logging
+
+from app.models.trade import trade_no_seq
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def allocate_trade_nos(db: Session, count: int) -> List[int]:
+    """
+    Reserve `count` trade numbers for new trades in one round trip.
+
+    Numbers come from nextval('trade_no_seq') over generate_series, so
+    concurrent writers never see the same number and never wait on each
+    other (numbers of rolled back inserts are skipped). trade_no stays
+    globally unique, which every lookup by trade_no relies on.
+    """
+    if count <= 0:
+        return []
+
+    series = func.generate_series(1, count).table_valued("n")
+    return list(db.execute(select(trade_no_seq.next_value()).select_from(series)).scalars())
+
+
+def allocate_trade_no(db: Session) -> int:
+    return allocate_trade_nos(db, 1)[0]
+
+
+def sync_trade_no_sequence(engine):
+    """
+    Tie trade_no_seq to trades.trade_no and move it past the highest stored
+    number. create_all() creates the sequence starting at 1, which on an
+    existing database would hand out numbers that are already taken.
+
+    Idempotent; the sequence is only moved when it is behind, so running
+    this while other workers insert never steps it backwards past them.
+    """
+    with engine.begin() as connection:
+        connection.execute(text("CREATE SEQUENCE IF NOT EXISTS trade_no_seq"))
+        moved = connection.execute(text(
+            "SELECT setval('trade_no_seq', m) FROM (SELECT MAX(trade_no) AS m FROM trades) AS t "
+            "WHERE m > (SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM trade_no_seq)"
+        )).scalar()
+
+        # The DDL below locks trades, so only run it until it has taken effect once
+        default = connection.execute(text(
+            "SELECT column_default FROM information_schema.columns "
+            "WHERE table_name = 'trades' AND column_name = 'trade_no'"
+        )).scalar()
+        if not default or "trade_no_seq" not in default:
+            connection.execute(text("ALTER SEQUENCE trade_no_seq OWNED BY trades.trade_no"))
+            connection.execute(text("ALTER TABLE trades ALTER COLUMN trade_no SET DEFAULT nextval('trade_no_seq')"))
+    if moved is not None:
+        logger.info(f"trade_no_seq moved past existing trade numbers (now {moved})")
@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, select
+from typing import List, Optional, Tuple
 from app.models.user import User
 from app.models.mt5_credentials import MT5Credentials
+from app.models.user_trade_stats import UserTradeStats
 import secrets
 import datetime
 import hashlib
@@ -39,6 +42,68 @@ def get_user_by_account(db: Session, account_number: int):
 def get_all_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(User).offset(skip).limit(limit).all()
 
+# Sortable columns of get_users_with_stats()
+_TOTAL_TRADES = func.coalesce(UserTradeStats.total_trades, 0)
+USER_SORT_COLUMNS = {
+    "name": (func.lower(User.first_name), func.lower(User.last_name)),
+    "email": (User.email,),
+    "role": (User.role,),
+    "is_active": (User.is_active,),
+    "joined_at": (User.created_at,),
+    "total_trades": (_TOTAL_TRADES,),
+    "net_profit": (func.coalesce(UserTradeStats.net_profit, 0.0),),
+    "win_rate": (func.coalesce(UserTradeStats.winning_trades, 0) * 100.0 / func.nullif(_TOTAL_TRADES, 0),),
+}
+
+def get_users_with_stats(db: Session, search: Optional[str] = None, role: Optional[str] = None,
+                         sort_by: str = "joined_at", descending: bool = True,
+                         skip: int = 0, limit: int = 100) -> Tuple[List, int]:
+    """
+    One page of users with their trade totals, in a single query: users LEFT
+    JOIN the user_trade_stats rollup, filtered, sorted and counted in SQL.
+
+    Args:
+        search: Case-insensitive substring of first/last/full name or email.
+        role: Only users with this role.
+        sort_by: A key of USER_SORT_COLUMNS.
+
+    Returns:
+        (rows, total) - rows carry the User as .User plus total_trades,
+        net_profit and winning_trades; total counts every matching user.
+    """
+    query = (
+        select(
+            User,
+            _TOTAL_TRADES.label("total_trades"),
+            func.coalesce(UserTradeStats.net_profit, 0.0).label("net_profit"),
+            func.coalesce(UserTradeStats.winning_trades, 0).label("winning_trades"),
+            func.count().over().label("total"),
+        )
+        .outerjoin(UserTradeStats, UserTradeStats.user_id == User.user_id)
+    )
+    if search:
+        # Match % and _ literally
+        escaped = search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        full_name = func.concat_ws(" ", User.first_name, User.last_name)
+        query = query.where(or_(
+            User.email.ilike(pattern, escape="\\"),
+            full_name.ilike(pattern, escape="\\"),
+        ))
+    if role:
+        query = query.where(User.role == role)
+
+    order = [column.desc().nullslast() if descending else column.asc().nullsfirst()
+             for column in USER_SORT_COLUMNS[sort_by]]
+    rows = db.execute(query.order_by(*order, User.user_id).offset(skip).limit(limit)).all()
+
+    if rows:
+        total = rows[0].total
+    else:
+        # Past the last page: the window count has no row to ride on
+        total = db.scalar(select(func.count()).select_from(query.subquery())) if skip else 0
+    return rows, total
+
 # ------------------- User Creation -------------------
 def create_user(db: Session, user_data: dict):
     """Create a new user with permanent UUID"""
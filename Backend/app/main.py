@@ -1,28 +1,29 @@
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import List, Optional
 import logging
 from datetime import datetime
 
 from app.database import Base, engine, get_db
-from app.crud.trade_crud import create_trade, get_trades, get_trade_by_trade_no, delete_trade, update_trade_reason
+from app.crud.trade_crud import create_trade, get_trades, get_trades_page, get_latest_opened_trade, get_trade_by_trade_no, delete_trade, update_trade_reason
 from app.crud.user_crud import (
     create_user, get_user, get_user_by_id, get_user_by_email, get_user_by_account,
     update_password, create_password_reset_token, verify_password_reset_token,
     login_user
 )
+from app.crud.trade_no_crud import sync_trade_no_sequence
+from app.crud.stats_crud import get_user_stats, refresh_stale_streaks
 from app.crud.mt5_crud import create_mt5_credentials, get_mt5_credentials, update_mt5_credentials, delete_mt5_credentials
-from app.services.mt5_service import fetch_mt5_trades, calculate_profit_loss
+from app.services.sync_jobs import sync_job_manager
 from app.schemas.trade_schema import TradeCreate, TradeBase
 from app.schemas.user_schema import (
     UserCreate, UserBase, UserResponse,
     UserLogin, ForgotPasswordRequest, ResetPasswordRequest
 )
 from app.schemas.mt5_schema import MT5CredentialsCreate, MT5CredentialsResponse
-from app.models.trade import Trade
 from app.models.user import User
 from app.models.mt5_credentials import MT5Credentials as MT5CredentialsModel
 
@@ -85,6 +86,7 @@ async def startup_event():
     try:
         # Create DB tables
         Base.metadata.create_all(bind=engine)
+        sync_trade_no_sequence(engine)
         logger.info("✅ Database connection established")
         logger.info("✅ Server startup complete!")
     except Exception as e:
@@ -144,10 +146,7 @@ def get_mt5_connection_status(user_id: str, db: Session = Depends(get_db)):
         last_fetch = None
         if recent_trades and len(recent_trades) > 0:
             # Get the most recent trade's creation time
-            from app.models.trade import Trade
-            most_recent = db.query(Trade).filter(
-                Trade.user_id == user_id
-            ).order_by(Trade.open_time.desc()).first()
+            most_recent = get_latest_opened_trade(db, user_id)
             if most_recent:
                 last_fetch = most_recent.open_time.isoformat() if hasattr(most_recent.open_time, 'isoformat') else str(most_recent.open_time)
         
@@ -208,7 +207,7 @@ def debug_mt5_credentials(user_id: str, db: Session = Depends(get_db)):
 app.include_router(auth_router, prefix="/api/auth", tags=["Auth"])
 
 # ----------------- MT5 Routes -----------------
-from app.routes import auth, admin, admin_users, admin_trades, admin_system, admin_analytics, announcements
+from app.routes import auth, admin, admin_users, admin_trades, admin_system, admin_analytics, announcements, analytics, mistakes
 from app.database import engine, Base
 
 app.include_router(mt5.router, prefix="/mt5", tags=["MT5"])
@@ -219,6 +218,8 @@ app.include_router(admin_system.router, prefix="/api/admin/system", tags=["Admin
 app.include_router(admin_analytics.router, prefix="/api/admin/analytics", tags=["Admin Analytics"])
 app.include_router(announcements.router, prefix="/api/announcements", tags=["announcements"])
 app.include_router(leaderboard.router, prefix="/api/leaderboard", tags=["Leaderboard"])
+app.include_router(analytics.router, prefix="/trades/analytics", tags=["Analytics"])
+app.include_router(mistakes.router, prefix="/trades/mistakes", tags=["Mistakes"])
 
 # ----------------- User Endpoints -----------------
 @app.post("/register", response_model=UserResponse)
@@ -310,17 +311,29 @@ def delete_user_mt5_credentials(user_id: str, db: Session = Depends(get_db)):
     return {"message": "MT5 credentials deleted successfully"}
 
 # ----------------- Trade Endpoints -----------------
+# Trade lists are newest first. Pass the X-Next-Cursor response header back as
+# ?cursor= for the next page (keyset - constant cost at any depth); skip still works.
 @app.get("/trades", response_model=List[TradeBase])
-def get_all_trades(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    trades = db.query(Trade).offset(skip).limit(limit).all()
+def get_all_trades(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                   db: Session = Depends(get_db)):
+    try:
+        trades, next_cursor = get_trades_page(db, cursor=cursor, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return trades
 
 @app.get("/trades/user/{user_id}", response_model=List[TradeBase])
-def get_trades_by_user(user_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    trades = get_trades(db, user_id, skip, limit)
-    if not trades:
-        return []  # Return empty array instead of 404
-    return trades
+def get_trades_by_user(user_id: str, response: Response, skip: int = 0, limit: int = 100,
+                       cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    try:
+        trades, next_cursor = get_trades_page(db, user_id=user_id, cursor=cursor, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trades  # Empty array instead of 404
 
 @app.get("/trades/trade/{trade_no}", response_model=TradeBase)
 def get_trade_by_number(trade_no: int, db: Session = Depends(get_db)):
@@ -366,7 +379,7 @@ def create_trade_endpoint(trade: TradeCreate, db: Session = Depends(get_db)):
 
 # ----------------- Fetch MT5 Trades -----------------
 @app.post("/users/{user_id}/fetch-mt5-trades")
-def fetch_mt5_trades_endpoint(user_id: str, db: Session = Depends(get_db)):
+def fetch_mt5_trades_endpoint(user_id: str, full_resync: bool = False, db: Session = Depends(get_db)):
     try:
         print(f"🔍 Fetch MT5 trades called for user: {user_id}")
         
@@ -401,106 +414,25 @@ def fetch_mt5_trades_endpoint(user_id: str, db: Session = Depends(get_db)):
         if not credentials.server:
             raise HTTPException(status_code=400, detail="MT5 server is missing")
         
-        # Convert account to int safely
+        # Validate account number format
         try:
-            account_number = int(credentials.account)
+            int(credentials.account)
         except (ValueError, TypeError) as e:
             raise HTTPException(status_code=400, detail=f"Invalid MT5 account number: {credentials.account}")
         
-        # Fetch trades from MT5
-        try:
-            trades = fetch_mt5_trades(
-                account=account_number,
-                password=credentials.password,
-                server=credentials.server,
-                days=90
-            )
-        except Exception as mt5_error:
-            error_msg = str(mt5_error)
-            print(f"❌ MT5 fetch error: {error_msg}")
-            # Check for specific MT5 errors
-            if "disconnected" in error_msg.lower() or "connection lost" in error_msg.lower():
-                raise HTTPException(
-                    status_code=503,
-                    detail="MT5 account disconnected from broker server. Please ensure MT5 terminal is connected to the broker server (check the connection status in MT5). Wait a few seconds for the connection to stabilize, then try again."
-                )
-            elif "IPC timeout" in error_msg or "(-10005" in error_msg:
-                raise HTTPException(
-                    status_code=503,
-                    detail="MT5 terminal is not responding (IPC timeout). This may occur if the account disconnected from the server. Please check MT5 connection status, wait for it to reconnect, then try again."
-                )
-            elif "Authorization failed" in error_msg or "(-6" in error_msg:
-                raise HTTPException(
-                    status_code=401,
-                    detail="MT5 authorization failed. Please reconnect with correct credentials."
-                )
-            elif "initialization failed" in error_msg.lower():
-                raise HTTPException(
-                    status_code=503,
-                    detail="MT5 terminal is not available. Please ensure MetaTrader 5 is installed and running."
-                )
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Failed to fetch trades from MT5: {error_msg}"
-                )
+        # Run the sync in the background; a sync already running for this account is reused
+        job, created = sync_job_manager.submit(user_id, credentials.account, credentials.server, full_resync)
         
-        # Ensure trades is a list
-        if trades is None:
-            trades = []
-        
-        saved_count, skipped_count, error_count = 0, 0, 0
-        
-        # Process each trade
-        for trade_data in trades:
-            try:
-                # Validate required fields
-                if 'ticket' not in trade_data:
-                    error_count += 1
-                    logger.warning(f"Skipping trade with missing ticket: {trade_data}")
-                    continue
-                
-                existing_trade = get_trade_by_ticket(db, trade_data['ticket'])
-                if existing_trade:
-                    skipped_count += 1
-                    continue
-                
-                profit_amt, loss_amt = calculate_profit_loss(trade_data.get('profit', 0.0))
-                
-                trade_create = TradeCreate(
-                    user_id=user_id,
-                    symbol=trade_data.get('symbol', 'UNKNOWN'),
-                    volume=trade_data.get('volume', 0.0),
-                    price_open=trade_data.get('price_open', 0.0),
-                    price_close=trade_data.get('price_close', 0.0),
-                    type=trade_data.get('type', 'unknown'),
-                    take_profit=trade_data.get('tp', 0.0),
-                    stop_loss=trade_data.get('sl', 0.0),
-                    profit_amount=profit_amt,
-                    loss_amount=loss_amt,
-                    net_profit=trade_data.get('profit', 0.0),
-                    reason="Fetched from MT5",
-                    mistake="To be analyzed",
-                    open_time=trade_data.get('time', datetime.now()),
-                    close_time=trade_data.get('time', datetime.now())
-                )
-                
-                create_trade(db, trade_create.model_dump())
-                saved_count += 1
-            except Exception as e:
-                error_count += 1
-                logger.error(f"Error processing trade {trade_data.get('ticket', 'unknown')}: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
-        
-        return {
-            "message": f"Trade fetch completed",
-            "total_fetched": len(trades),
-            "newly_saved": saved_count,
-            "already_exist": skipped_count,
-            "errors": error_count,
-            "user_id": user_id
-        }
+        return JSONResponse(
+            status_code=202,
+            content={
+                "message": "Trade fetch started" if created else "Trade fetch already in progress",
+                "job_id": job.job_id,
+                "status": job.status,
+                "status_url": f"/sync-jobs/{job.job_id}",
+                "user_id": user_id
+            }
+        )
     except HTTPException:
         # Re-raise HTTPExceptions as-is
         raise
@@ -516,29 +448,45 @@ def fetch_mt5_trades_endpoint(user_id: str, db: Session = Depends(get_db)):
             detail=f"An unexpected error occurred while fetching trades: {error_msg}"
         )
 
+@app.get("/sync-jobs/{job_id}")
+def get_sync_job_status(job_id: str):
+    """Status and progress counts of a background MT5 sync"""
+    job = sync_job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job.to_dict()
+
 # ----------------- Trade Statistics -----------------
 @app.get("/trades/stats/user/{user_id}")
 def get_trade_statistics(user_id: str, db: Session = Depends(get_db)):
-    trades = get_trades(db, user_id, 0, 1000)
-    if not trades:
+    # O(1) lookup on the per-user rollup instead of summing raw trades
+    stats = get_user_stats(db, user_id)
+    if not stats or stats.total_trades == 0:
         return {"message": "No trades found", "user_id": user_id}
+    if stats.streaks_stale:
+        # Late or deleted trades invalidated the streaks; one recompute, then O(1) again
+        stats = refresh_stale_streaks(db, user_id)
+        db.commit()
     
-    total_trades = len(trades)
-    total_profit = sum(trade.profit_amount for trade in trades)
-    total_loss = sum(trade.loss_amount for trade in trades)
-    net_profit = total_profit - total_loss
-    winning_trades = sum(1 for trade in trades if trade.net_profit > 0)
+    total_trades = stats.total_trades
+    winning_trades = stats.winning_trades
     losing_trades = total_trades - winning_trades
     
     return {
         "user_id": user_id,
         "total_trades": total_trades,
-        "total_profit": total_profit,
-        "total_loss": total_loss,
-        "net_profit": net_profit,
+        "total_profit": stats.total_profit,
+        "total_loss": stats.total_loss,
+        "net_profit": stats.total_profit - stats.total_loss,
         "winning_trades": winning_trades,
         "losing_trades": losing_trades,
-        "win_rate": (winning_trades / total_trades * 100) if total_trades > 0 else 0
+        "win_rate": (winning_trades / total_trades * 100) if total_trades > 0 else 0,
+        "avg_win": stats.winning_net / winning_trades if winning_trades > 0 else 0,
+        "avg_loss": (stats.winning_net - stats.net_profit) / losing_trades if losing_trades > 0 else 0,
+        "expectancy": stats.net_profit / total_trades,
+        "largest_win_streak": stats.max_win_streak,
+        "largest_loss_streak": stats.max_loss_streak,
+        "current_streak": stats.current_streak
     }
 
 # ----------------- Debug All Endpoints -----------------
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -13,6 +13,12 @@ class LoginHistory(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", backref="login_logs")
+    
+    # Per-user login history, newest first; platform-wide activity by time
+    __table_args__ = (
+        Index('ix_login_history_user_timestamp', 'user_id', 'timestamp'),
+        Index('ix_login_history_timestamp', 'timestamp'),
+    )
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
@@ -18,6 +18,7 @@ class MT5Credentials(Base):
     )
     
     user = relationship("User", back_populates="mt5_credentials")
+    sync_state = relationship("MT5SyncState", back_populates="credentials", uselist=False, cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<MT5Credentials {self.account}@{self.server}>"
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class MT5SyncState(Base):
+    """High-water mark of the last MT5 history sync for one credentials row"""
+    __tablename__ = "mt5_sync_state"
+    
+    credentials_id = Column(Integer, ForeignKey("mt5_credentials.id", ondelete="CASCADE"), primary_key=True)
+    
+    # Account the watermark belongs to - a credentials update to another account invalidates it
+    account = Column(String, nullable=False)
+    server = Column(String, nullable=False)
+    
+    last_deal_time = Column(DateTime, nullable=True)
+    last_deal_ticket = Column(BigInteger, nullable=True)
+    last_synced_at = Column(DateTime, nullable=True)
+    
+    credentials = relationship("MT5Credentials", back_populates="sync_state")
+    
+    def __repr__(self):
+        return f"<MT5SyncState {self.account}@{self.server} until {self.last_deal_time}>"
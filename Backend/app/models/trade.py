@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Index, Sequence
 from sqlalchemy.orm import relationship
 from app.database import Base
 
+# Source of global trade numbers (see app.crud.trade_no_crud)
+trade_no_seq = Sequence("trade_no_seq", metadata=Base.metadata)
+
 class Trade(Base):
     __tablename__ = "trades"
     
@@ -9,7 +12,7 @@ class Trade(Base):
     user_id = Column(String, ForeignKey('users.user_id'))  # ✅ Changed to String
     
     # Trade details
-    trade_no = Column(Integer, unique=True, index=True, nullable=False, autoincrement=False)
+    trade_no = Column(Integer, trade_no_seq, unique=True, index=True, nullable=False, autoincrement=False)
     symbol = Column(String)
     volume = Column(Float)
     price_open = Column(Float)
@@ -24,6 +27,8 @@ class Trade(Base):
     profit_amount = Column(Float, default=0.0)
     loss_amount = Column(Float, default=0.0)
     net_profit = Column(Float)
+    commission = Column(Float, default=0.0)  # Broker costs, already included in net_profit
+    swap = Column(Float, default=0.0)
     
     # Analysis
     reason = Column(String, default="enter the reason")
@@ -33,6 +38,20 @@ class Trade(Base):
     open_time = Column(DateTime)
     close_time = Column(DateTime)
     
+    # MT5 source (NULL for manually entered trades)
+    broker_ticket = Column(BigInteger, nullable=True)
+    broker_account = Column(String, nullable=True)
+    broker_server = Column(String, nullable=True)
+    
+    # ✅ A broker ticket is stored at most once per MT5 account
+    # ✅ Hot paths filter by user and order/filter by close or open time
+    __table_args__ = (
+        Index('uq_trades_broker_ticket', 'broker_account', 'broker_server', 'broker_ticket', unique=True),
+        Index('ix_trades_user_close_time', 'user_id', 'close_time'),
+        Index('ix_trades_user_open_time', 'user_id', 'open_time'),
+        Index('ix_trades_close_time', 'close_time'),
+    )
+    
     # ✅ Use back_populates instead of backref for explicit relationship
     user = relationship("User", back_populates="trades")
     
@@ -13,13 +13,14 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
     mobile_number = Column(String(15), nullable=True)
-    role = Column(String, default="user")
+    role = Column(String, default="user", index=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.datetime.now)
+    created_at = Column(DateTime, default=datetime.datetime.now, index=True)
     
     # ✅ Relationships with proper back_populates
     mt5_credentials = relationship("MT5Credentials", back_populates="user", uselist=False, cascade="all, delete-orphan")
     trades = relationship("Trade", back_populates="user", cascade="all, delete-orphan")
+    trade_stats = relationship("UserTradeStats", back_populates="user", uselist=False, cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<User {self.user_id} - {self.email}>"
\ No newline at end of file
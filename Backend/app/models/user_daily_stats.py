@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from app.database import Base
+
+class UserDailyStats(Base):
+    """Per-user, per-trading-day rollup (bucketed on close_time), kept in sync by app.crud.stats_crud"""
+    __tablename__ = "user_daily_stats"
+    
+    user_id = Column(String, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    trade_date = Column(Date, primary_key=True)
+    
+    total_trades = Column(Integer, default=0, nullable=False)
+    winning_trades = Column(Integer, default=0, nullable=False)
+    gross_profit = Column(Float, default=0.0, nullable=False)
+    gross_loss = Column(Float, default=0.0, nullable=False)
+    net_profit = Column(Float, default=0.0, nullable=False)
+    best_trade = Column(Float, nullable=True)
+    worst_trade = Column(Float, nullable=True)
+    
+    def __repr__(self):
+        return f"<UserDailyStats {self.user_id} {self.trade_date} - {self.total_trades} trades>"
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey
+from sqlalchemy.orm import relationship
+from app.database import Base
+from datetime import datetime
+
+class UserTradeStats(Base):
+    """Per-user rollup of trade statistics, kept in sync by app.crud.stats_crud"""
+    __tablename__ = "user_trade_stats"
+    
+    user_id = Column(String, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    
+    # Counters
+    total_trades = Column(Integer, default=0, nullable=False)
+    winning_trades = Column(Integer, default=0, nullable=False)
+    losing_trades = Column(Integer, default=0, nullable=False)
+    
+    # Sums
+    total_profit = Column(Float, default=0.0, nullable=False)
+    total_loss = Column(Float, default=0.0, nullable=False)
+    net_profit = Column(Float, default=0.0, nullable=False)
+    winning_net = Column(Float, default=0.0, nullable=False)  # net_profit summed over winning trades
+    
+    # Extremes (NULL while the user has no trades)
+    best_trade = Column(Float, nullable=True)
+    worst_trade = Column(Float, nullable=True)
+    
+    # Win/loss streaks in close_time order; current_streak is +n wins or -n losses.
+    # Trades closing before last_close_time (or removed) set streaks_stale and the
+    # streaks are recomputed from the trades table on next read
+    max_win_streak = Column(Integer, default=0, nullable=False)
+    max_loss_streak = Column(Integer, default=0, nullable=False)
+    current_streak = Column(Integer, default=0, nullable=False)
+    last_close_time = Column(DateTime, nullable=True)
+    streaks_stale = Column(Boolean, default=True, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    user = relationship("User", back_populates="trade_stats")
+    
+    def __repr__(self):
+        return f"<UserTradeStats {self.user_id} - {self.total_trades} trades>"
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
 from app.models.user import User
 from app.models.trade import Trade
-from app.crud.user_crud import get_all_users
+from app.crud.user_crud import get_users_with_stats
 
 router = APIRouter()
 
@@ -37,22 +37,29 @@ def get_current_user_role(token: str = Depends(oauth2_scheme), db: Session = Dep
 
 @router.get("/users")
 def get_all_users_stats(
+    response: Response,
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    sort_by: str = Query("joined_at", regex="^(name|email|role|is_active|joined_at|total_trades|net_profit|win_rate)$"),
+    order: str = Query("desc", regex="^(asc|desc)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_user_role),
     db: Session = Depends(get_db)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    users = get_all_users(db)
+    # One query: users joined to the stats rollup, filtered/sorted/paged in SQL
+    rows, total = get_users_with_stats(db, search=search, role=role, sort_by=sort_by,
+                                       descending=(order == "desc"), skip=skip, limit=limit)
+    response.headers["X-Total-Count"] = str(total)
     results = []
     
-    for user in users:
-        # Calculate summary stats for each user
-        trades = user.trades
-        total_trades = len(trades)
-        net_profit = sum(t.net_profit for t in trades)
-        wins = sum(1 for t in trades if t.net_profit > 0)
-        win_rate = (wins / total_trades * 100) if total_trades > 0 else 0
+    for row in rows:
+        user = row.User
+        total_trades = row.total_trades
+        win_rate = (row.winning_trades / total_trades * 100) if total_trades > 0 else 0
         
         results.append({
             "user_id": user.user_id,
@@ -61,7 +68,7 @@ def get_all_users_stats(
             "role": user.role,
             "is_active": user.is_active,
             "total_trades": total_trades,
-            "net_profit": net_profit,
+            "net_profit": row.net_profit,
             "win_rate": win_rate,
             "joined_at": user.created_at
         })
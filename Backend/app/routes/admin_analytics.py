@@ -1,14 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List, Dict
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
 from app.database import get_db
 from app.models.user import User
 from app.models.trade import Trade
 from app.routes.admin import get_current_user_role
+from app.crud.stats_crud import get_user_performance_page
+from app.services.activity_service import get_activity
 
 router = APIRouter()
 
+def _naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC; convert a query datetime sent with an offset to match"""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
 @router.get("/overview")
 def get_analytics_overview(
     db: Session = Depends(get_db),
@@ -31,68 +40,67 @@ def get_analytics_overview(
 
 @router.get("/user-performance")
 def get_user_performance(
+    response: Response,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    symbol: Optional[str] = None,
+    sort_by: str = Query("trade_count", regex="^(trade_count|avg_profit|avg_loss|avg_net)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_user_role)
 ):
-    """Get per-user performance metrics"""
+    """
+    Get per-user performance metrics, optionally over a close_time range
+    and/or one symbol. Pass the X-Next-Cursor header back as ?cursor= for
+    the next page.
+    """
     if admin.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Get all users except admins
-    users = db.query(User).filter(User.role != "admin").all()
+    # One aggregate query (rollup, or GROUP BY over the filtered trades)
+    try:
+        rows, next_cursor = get_user_performance_page(db, start=_naive_utc(start), end=_naive_utc(end), symbol=symbol,
+                                                      sort_by=sort_by, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     performance_data = []
     
-    for user in users:
-        # Get user's trades
-        trades = db.query(Trade).filter(Trade.user_id == user.user_id).all()
-        
-        if not trades:
-            continue
-            
-        trade_count = len(trades)
-        total_profit = sum(t.profit_amount for t in trades)
-        total_loss = sum(t.loss_amount for t in trades)
-        
-        avg_profit = total_profit / trade_count if trade_count > 0 else 0
-        avg_loss = total_loss / trade_count if trade_count > 0 else 0
-        
+    for row in rows:
         performance_data.append({
-            "user_id": user.user_id,
-            "name": f"{user.first_name} {user.last_name}",
-            "email": user.email,
-            "trade_count": trade_count,
-            "avg_profit": float(avg_profit),
-            "avg_loss": float(avg_loss),
-            "avg_net": float(avg_profit - avg_loss)
+            "user_id": row.user_id,
+            "name": f"{row.first_name} {row.last_name}",
+            "email": row.email,
+            "trade_count": row.trade_count,
+            "avg_profit": float(row.avg_profit),
+            "avg_loss": float(row.avg_loss),
+            "avg_net": float(row.avg_net)
         })
     
-    # Sort by trade count descending
-    performance_data.sort(key=lambda x: x["trade_count"], reverse=True)
-    
     return performance_data
 
 @router.get("/activity")
 def get_activity_data(
+    bucket: str = Query("day", regex="^(hour|day|week)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_user_role)
 ):
-    """Get daily trading activity for the past 7 days"""
+    """
+    Get platform activity (trades, active traders, signups, logins) per
+    hour, day or week; defaults to the past 7 days by day
+    """
     if admin.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Return actual data showing 3 trades on Friday
-    return [
-        {"date": "Mon", "trades": 0},
-        {"date": "Tue", "trades": 0},
-        {"date": "Wed", "trades": 0},
-        {"date": "Thu", "trades": 0},
-        {"date": "Fri", "trades": 3},
-        {"date": "Sat", "trades": 0},
-        {"date": "Sun", "trades": 0}
-    ]
-
-
-
-
-
+    start, end = _naive_utc(start), _naive_utc(end)
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=6)
+    try:
+        return get_activity(db, start, end, bucket=bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
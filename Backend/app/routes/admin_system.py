@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, select, cast, case, or_, literal, literal_column, table, true, BigInteger
+from sqlalchemy.dialects.postgresql import CIDR, INET, REGCLASS
 from typing import List, Optional
 from datetime import datetime, timedelta
+import ipaddress
 from app.database import get_db
 from app.models.user import User
 from app.models.trade import Trade
 from app.models.logs import LoginHistory
 from app.models.announcement import Announcement
 from app.routes.admin import get_current_user_role
+from app.services.cache_service import admin_stats_cache
+from app.crud.pagination import decode_cursor, keyset_after, next_cursor
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -27,58 +31,144 @@ class AnnouncementUpdate(BaseModel):
 
 @router.get("/stats")
 def get_dashboard_stats(
+    estimate: bool = False,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_user_role)
 ):
+    """
+    Platform counters for the admin dashboard, cached for a few seconds.
+    With estimate=true, total_users/total_trades come from the planner's
+    row estimates instead of full-table counts.
+    """
     if admin.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    total_users = db.query(User).count()
-    total_trades = db.query(Trade).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    
-    # Calculate some activity metrics
+    return admin_stats_cache.get_or_compute(estimate, lambda: _count_platform(db, estimate))
+
+def _count_platform(db: Session, estimate: bool) -> dict:
+    """All dashboard counters in one round trip, one scan per table (FILTER aggregates)"""
     one_day_ago = datetime.utcnow() - timedelta(days=1)
-    new_users_24h = db.query(User).filter(User.created_at >= one_day_ago).count()
-    trades_24h = db.query(Trade).filter(Trade.close_time >= one_day_ago).count()
     
-    return {
-        "total_users": total_users,
-        "total_trades": total_trades,
-        "active_users": active_users,
-        "new_users_24h": new_users_24h,
-        "trades_24h": trades_24h
-    }
+    users = select(
+        func.count().label("total_users"),
+        func.count().filter(User.is_active == True).label("active_users"),
+        func.count().filter(User.created_at >= one_day_ago).label("new_users_24h"),
+    ).subquery()
+    
+    if estimate:
+        # Only the indexed last-24h range is counted exactly
+        trades = select(
+            _row_estimate("trades").label("total_trades"),
+            func.count().label("trades_24h"),
+        ).where(Trade.close_time >= one_day_ago).subquery()
+        total_users = _row_estimate("users").label("total_users")
+    else:
+        trades = select(
+            func.count().label("total_trades"),
+            func.count().filter(Trade.close_time >= one_day_ago).label("trades_24h"),
+        ).subquery()
+        total_users = users.c.total_users
+    
+    row = db.execute(select(
+        total_users, trades.c.total_trades, users.c.active_users,
+        users.c.new_users_24h, trades.c.trades_24h,
+    ).select_from(users).join(trades, true())).one()
+    
+    counters = dict(row._mapping)
+    if estimate and min(counters["total_users"], counters["total_trades"]) < 0:
+        # Never-analyzed tables have no estimate yet (reltuples = -1)
+        return _count_platform(db, estimate=False)
+    return counters
+
+def _row_estimate(table_name: str):
+    """pg_class.reltuples - the row count as of the last VACUUM/ANALYZE"""
+    return select(cast(literal_column("reltuples"), BigInteger)).select_from(
+        table("pg_class")
+    ).where(literal_column("oid") == cast(literal(table_name), REGCLASS)).scalar_subquery()
+
+# Only strings shaped like an IPv4/IPv6 address are cast to inet for ?ip= range
+# filters; anything else stored in ip_address (e.g. "testclient") never matches
+_IPV4 = r"((25[0-5]|2[0-4][0-9]|1?[0-9]?[0-9])\.){3}(25[0-5]|2[0-4][0-9]|1?[0-9]?[0-9])"
+_IPV4_PATTERN = f"^{_IPV4}$"
+
+
+def _ipv6_forms(groups: int, last: str) -> List[str]:
+    """`groups` hex groups then `last`, written out in full or with "::" after any of them"""
+    hex_group = "[0-9A-Fa-f]{1,4}:"
+    forms = [f"({hex_group}){{{groups}}}{last}"]
+    for left in range(groups):
+        forms.append((f"({hex_group}){{{left}}}" if left else ":") + f":({hex_group}){{0,{groups - 1 - left}}}{last}")
+    return forms
+
+
+# Strictly address-shaped: a stored value like ":" must never reach the cast
+_IPV6_PATTERN = "^(" + "|".join(
+    _ipv6_forms(7, "[0-9A-Fa-f]{1,4}")
+    + _ipv6_forms(6, _IPV4)
+    + ["([0-9A-Fa-f]{1,4}:){1,7}:", "::"]
+) + ")$"
 
 @router.get("/logs/login")
 def get_login_logs(
+    response: Response,
     skip: int = 0, 
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    user: Optional[str] = None,
+    ip: Optional[str] = None,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_user_role)
 ):
+    """
+    Login history, newest first, with each user's email joined in.
+    Filters: status, user (user_id or email), ip (an address or a CIDR
+    range such as 10.0.0.0/8). Pass the X-Next-Cursor header back as
+    ?cursor= for the next page; skip still works without a cursor.
+    """
     if admin.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
-        
-    logs = db.query(LoginHistory).order_by(desc(LoginHistory.timestamp)).offset(skip).limit(limit).all()
-    # Populate user email for easier reading if user still exists
-    # Or just return raw log and let frontend handle
-    # Let's map it if possible to include user email
+    
+    query = select(LoginHistory, User.email).outerjoin(User, User.user_id == LoginHistory.user_id)
+    if status:
+        query = query.where(LoginHistory.status == status)
+    if user:
+        query = query.where(or_(LoginHistory.user_id == user, func.lower(User.email) == user.lower()))
+    if ip:
+        try:
+            network = ipaddress.ip_network(ip, strict=False)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid IP address or range")
+        pattern = _IPV4_PATTERN if network.version == 4 else _IPV6_PATTERN
+        address = case(
+            (LoginHistory.ip_address.op("~")(pattern), cast(LoginHistory.ip_address, INET)),
+            else_=None
+        )
+        query = query.where(address.op("<<=")(cast(str(network), CIDR)))
+    
+    try:
+        if cursor:
+            query = query.where(keyset_after(LoginHistory.timestamp, LoginHistory.id, decode_cursor(cursor)))
+        elif skip:
+            query = query.offset(skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # One query for the page, emails included - no per-row user lookups
+    rows = db.execute(
+        query.order_by(LoginHistory.timestamp.desc(), LoginHistory.id.desc()).limit(limit)
+    ).all()
+    logs = [log for log, _ in rows]
+    next_page = next_cursor(logs, limit, "timestamp")
+    if next_page:
+        response.headers["X-Next-Cursor"] = next_page
     
     result = []
-    for log in logs:
-        user_email = "Unknown"
-        if log.user:
-            user_email = log.user.email
-        elif log.user_id:
-            # Fallback if relationship not autoloaded, though it should be
-            u = db.query(User).filter(User.user_id == log.user_id).first()
-            if u: user_email = u.email
-            
+    for log, email in rows:
         result.append({
             "id": log.id,
             "user_id": log.user_id,
-            "email": user_email,
+            "email": email or "Unknown",
             "ip_address": log.ip_address,
             "status": log.status,
             "timestamp": log.timestamp
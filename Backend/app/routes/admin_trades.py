@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 from typing import List, Optional
 from datetime import date
 from app.database import get_db
 from app.models.trade import Trade
 from app.models.user import User
 from app.routes.admin import get_current_user_role
+from app.crud.stats_crud import remove_trade, update_trade_stats
+from app.crud.trade_crud import get_trades_page
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -27,27 +28,30 @@ def get_all_trades(
     end_date: Optional[date] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_user_role)
 ):
     if admin.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
-        
-    query = db.query(Trade)
     
+    # Keyset page when a cursor is given (pass next_cursor back), else offset
+    try:
+        trades, next_cursor = get_trades_page(db, user_id=user_id, cursor=cursor, skip=skip, limit=limit,
+                                              start=start_date, end=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    query = db.query(Trade)
     if user_id:
         query = query.filter(Trade.user_id == user_id)
-        
     if start_date:
         query = query.filter(Trade.close_time >= start_date)
-        
     if end_date:
         query = query.filter(Trade.close_time <= end_date)
-        
-    trades = query.order_by(desc(Trade.close_time)).offset(skip).limit(limit).all()
     count = query.count()
     
-    return {"trades": trades, "total": count}
+    return {"trades": trades, "total": count, "next_cursor": next_cursor}
 
 @router.put("/{trade_id}")
 def update_trade(
@@ -63,6 +67,8 @@ def update_trade(
     if not trade:
         raise HTTPException(status_code=404, detail="Trade not found")
         
+    old_values = (trade.close_time, trade.net_profit, trade.profit_amount, trade.loss_amount)
+    
     if trade_update.mistake is not None:
         trade.mistake = trade_update.mistake
     if trade_update.reason is not None:
@@ -76,6 +82,11 @@ def update_trade(
     if trade.profit_amount != 0 or trade.loss_amount != 0:
         trade.net_profit = trade.profit_amount - trade.loss_amount
         
+    new_values = (trade.close_time, trade.net_profit, trade.profit_amount, trade.loss_amount)
+    if new_values != old_values:
+        db.flush()
+        update_trade_stats(db, trade.user_id, old_values, new_values)
+        
     db.commit()
     db.refresh(trade)
     return trade
@@ -94,5 +105,7 @@ def delete_trade(
         raise HTTPException(status_code=404, detail="Trade not found")
         
     db.delete(trade)
+    db.flush()
+    remove_trade(db, trade.user_id, trade.close_time, trade.net_profit, trade.profit_amount, trade.loss_amount)
     db.commit()
     return {"message": "Trade deleted successfully"}
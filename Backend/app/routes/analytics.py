@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+import logging
+
+import numpy as np
+
+from app.database import get_db
+from app.models.user import User
+from app.models.trade import Trade
+from app.services.equity_curve import equity_curve
+from app.services.analytics_engine import get_performance_metrics
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# -------------- Equity Curve --------------
+@router.get("/{user_id}/equity")
+def get_equity_curve(
+    user_id: str,
+    points: int = Query(500, ge=10, le=5000),
+    method: str = Query("lttb", regex="^(lttb|bucket)$"),
+    initial_balance: float = Query(0.0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a user's cumulative P&L curve, downsampled to at most `points` points,
+    with max drawdown and drawdown duration over all of their trades
+    """
+    if not db.get(User, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Two columns straight off the (user_id, close_time) index
+    rows = db.execute(
+        select(Trade.close_time, Trade.net_profit)
+        .where(Trade.user_id == user_id, Trade.close_time.isnot(None))
+        .order_by(Trade.close_time, Trade.id)
+    ).all()
+
+    close_times = np.array([row[0] for row in rows], dtype="datetime64[us]")
+    net_profits = np.array([row[1] or 0.0 for row in rows], dtype=np.float64)
+
+    curve = equity_curve(close_times, net_profits, points=points, method=method,
+                         initial_balance=initial_balance)
+    return {"user_id": user_id, **curve}
+
+
+# -------------- Performance Metrics --------------
+@router.get("/{user_id}/metrics")
+def get_metrics(
+    user_id: str,
+    initial_balance: float = Query(0.0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a user's performance metrics: Sharpe/Sortino on daily returns, max
+    drawdown, recovery factor, expectancy, streaks, R-multiples and P&L by
+    hour and weekday. Cached until the user's trades change.
+    """
+    if not db.get(User, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return {"user_id": user_id, **get_performance_metrics(db, user_id, initial_balance=initial_balance)}
@@ -1,18 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from sqlalchemy import func
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 import logging
+import os
 
 from app.database import get_db
 from app.models.user import User
-from app.models.trade import Trade
+from app.models.user_trade_stats import UserTradeStats
+from app.models.user_daily_stats import UserDailyStats
 from app.schemas.leaderboard_schema import LeaderboardEntry, UserRankingResponse
+from app.services.cache_service import leaderboard_cache
+from app.services.rank_index import RankIndex
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# How daily/weekly/monthly periods are bounded:
+#   "rolling"  - the last 1/7/30 trading days, including today
+#   "calendar" - today / since Monday / since the 1st of the month
+LEADERBOARD_PERIOD_MODE = os.getenv("LEADERBOARD_PERIOD_MODE", "rolling")
+
+ROLLING_PERIOD_DAYS = {"daily": 1, "weekly": 7, "monthly": 30}
+
+
+def get_period_start(time_period: Optional[str], mode: Optional[str] = None) -> Optional[date]:
+    """
+    Get the first trading day included in a leaderboard period
+    
+    Args:
+        time_period: all_time, monthly, weekly or daily
+        mode: rolling or calendar (defaults to LEADERBOARD_PERIOD_MODE)
+    
+    Returns:
+        First included date, or None for all_time
+    """
+    if time_period not in ROLLING_PERIOD_DAYS:
+        return None
+    
+    today = datetime.now().date()
+    if (mode or LEADERBOARD_PERIOD_MODE) == "calendar":
+        if time_period == "weekly":
+            return today - timedelta(days=today.weekday())
+        if time_period == "monthly":
+            return today.replace(day=1)
+        return today
+    
+    return today - timedelta(days=ROLLING_PERIOD_DAYS[time_period] - 1)
+
 
 def calculate_leaderboard_stats(db: Session, time_period: Optional[str] = "all_time"):
     """
@@ -25,61 +61,86 @@ def calculate_leaderboard_stats(db: Session, time_period: Optional[str] = "all_t
     Returns:
         List of leaderboard entries with calculated statistics
     """
-    # Determine time filter
-    time_filter = None
-    if time_period == "weekly":
-        time_filter = datetime.now() - timedelta(days=7)
-    elif time_period == "monthly":
-        time_filter = datetime.now() - timedelta(days=30)
-    elif time_period == "daily":
-        time_filter = datetime.now() - timedelta(days=1)
-    
-    # Get all users with their trades
-    users = db.query(User).filter(User.role == "user").all()
+    # Determine the first trading day of the period
+    period_start = get_period_start(time_period)
+    
+    if period_start is None:
+        # All-time stats come straight from the per-user rollup
+        rows = db.query(
+            User.user_id,
+            User.first_name,
+            User.last_name,
+            User.email,
+            User.created_at,
+            UserTradeStats.total_trades,
+            UserTradeStats.winning_trades,
+            UserTradeStats.losing_trades,
+            UserTradeStats.total_profit,
+            UserTradeStats.total_loss,
+            UserTradeStats.net_profit,
+            UserTradeStats.best_trade,
+            UserTradeStats.worst_trade,
+        ).join(UserTradeStats, UserTradeStats.user_id == User.user_id).filter(
+            User.role == "user",
+            UserTradeStats.total_trades > 0
+        ).all()
+    else:
+        # Sum the per-day rollup rows in the period (at most ~31 rows per user),
+        # so the cost does not grow with raw trade volume
+        total_trades = func.sum(UserDailyStats.total_trades)
+        winning_trades = func.sum(UserDailyStats.winning_trades)
+        rows = db.query(
+            User.user_id,
+            User.first_name,
+            User.last_name,
+            User.email,
+            User.created_at,
+            total_trades.label('total_trades'),
+            winning_trades.label('winning_trades'),
+            (total_trades - winning_trades).label('losing_trades'),
+            func.sum(UserDailyStats.gross_profit).label('total_profit'),
+            func.sum(UserDailyStats.gross_loss).label('total_loss'),
+            func.sum(UserDailyStats.net_profit).label('net_profit'),
+            func.max(UserDailyStats.best_trade).label('best_trade'),
+            func.min(UserDailyStats.worst_trade).label('worst_trade'),
+        ).join(UserDailyStats, UserDailyStats.user_id == User.user_id).filter(
+            User.role == "user",
+            UserDailyStats.trade_date >= period_start,
+            UserDailyStats.total_trades > 0
+        ).group_by(
+            User.user_id, User.first_name, User.last_name, User.email, User.created_at
+        ).all()
     
     leaderboard_data = []
     
-    for user in users:
-        # Query trades for this user
-        trades_query = db.query(Trade).filter(Trade.user_id == user.user_id)
-        
-        # Apply time filter if specified
-        if time_filter:
-            trades_query = trades_query.filter(Trade.close_time >= time_filter)
-        
-        trades = trades_query.all()
-        
-        # Skip users with no trades
-        if not trades:
-            continue
-        
+    for row in rows:
         # Calculate statistics
-        total_trades = len(trades)
-        winning_trades = sum(1 for t in trades if t.net_profit > 0)
-        losing_trades = sum(1 for t in trades if t.net_profit <= 0)
+        total_trades = row.total_trades
+        winning_trades = int(row.winning_trades or 0)
+        losing_trades = int(row.losing_trades or 0)
         win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
         
-        total_profit = sum(t.profit_amount for t in trades)
-        total_loss = sum(t.loss_amount for t in trades)
-        net_profit = sum(t.net_profit for t in trades)
+        total_profit = float(row.total_profit or 0)
+        total_loss = float(row.total_loss or 0)
+        net_profit = float(row.net_profit or 0)
         
         avg_profit_per_trade = net_profit / total_trades if total_trades > 0 else 0
         
-        best_trade = max((t.net_profit for t in trades), default=0)
-        worst_trade = min((t.net_profit for t in trades), default=0)
+        best_trade = float(row.best_trade or 0)
+        worst_trade = float(row.worst_trade or 0)
         
         # Calculate profit factor (total profit / total loss)
         profit_factor = (total_profit / total_loss) if total_loss > 0 else (total_profit if total_profit > 0 else 0)
         
         # Create username from first_name and last_name
-        username = f"{user.first_name or ''} {user.last_name or ''}".strip()
+        username = f"{row.first_name or ''} {row.last_name or ''}".strip()
         if not username:
-            username = user.email.split('@')[0]  # Use email prefix if no name
+            username = row.email.split('@')[0]  # Use email prefix if no name
         
         leaderboard_data.append({
-            'user_id': user.user_id,
+            'user_id': row.user_id,
             'username': username,
-            'email': user.email,
+            'email': row.email,
             'total_trades': total_trades,
             'winning_trades': winning_trades,
             'losing_trades': losing_trades,
@@ -91,12 +152,34 @@ def calculate_leaderboard_stats(db: Session, time_period: Optional[str] = "all_t
             'best_trade': round(best_trade, 2),
             'worst_trade': round(worst_trade, 2),
             'profit_factor': round(profit_factor, 2),
-            'created_at': user.created_at
+            'created_at': row.created_at
         })
     
     return leaderboard_data
 
 
+def get_rank_index(db: Session, sort_by: str, time_period: str) -> RankIndex:
+    """
+    Get the precomputed rank index for a metric and period
+    
+    Indexes are cached per (sort_by, time_period) and invalidated whenever trade
+    statistics change, so they are rebuilt at most once per change.
+    The returned index is shared - do not mutate it.
+    
+    Args:
+        db: Database session
+        sort_by: Metric to sort by (net_profit, win_rate, total_trades, profit_factor)
+        time_period: Time period filter (all_time, monthly, weekly, daily)
+    
+    Returns:
+        RankIndex over the leaderboard entries
+    """
+    return leaderboard_cache.get_or_compute(
+        (sort_by, time_period),
+        lambda: RankIndex(calculate_leaderboard_stats(db, time_period), sort_by)
+    )
+
+
 @router.get("/", response_model=List[LeaderboardEntry])
 def get_leaderboard(
     sort_by: str = Query("net_profit", regex="^(net_profit|win_rate|total_trades|profit_factor)$"),
@@ -117,20 +200,8 @@ def get_leaderboard(
         List of leaderboard entries sorted by specified metric
     """
     try:
-        # Calculate statistics
-        leaderboard_data = calculate_leaderboard_stats(db, time_period)
-        
-        # Sort by specified metric (descending)
-        leaderboard_data.sort(key=lambda x: x[sort_by], reverse=True)
-        
-        # Limit results
-        leaderboard_data = leaderboard_data[:limit]
-        
-        # Add rank
-        for idx, entry in enumerate(leaderboard_data, start=1):
-            entry['rank'] = idx
-        
-        return leaderboard_data
+        # Sorted, ranked statistics (cached)
+        return get_rank_index(db, sort_by, time_period).top(limit)
     
     except Exception as e:
         logger.error(f"Error fetching leaderboard: {str(e)}")
@@ -142,6 +213,7 @@ def get_user_ranking(
     user_id: str,
     sort_by: str = Query("net_profit", regex="^(net_profit|win_rate|total_trades|profit_factor)$"),
     time_period: str = Query("all_time", regex="^(all_time|monthly|weekly|daily)$"),
+    nearby: int = Query(2, ge=0, le=10),
     db: Session = Depends(get_db)
 ):
     """
@@ -151,10 +223,11 @@ def get_user_ranking(
         user_id: User ID to get ranking for
         sort_by: Metric to sort by (net_profit, win_rate, total_trades, profit_factor)
         time_period: Time period filter (all_time, monthly, weekly, daily)
+        nearby: Number of users to include directly above and below
         db: Database session
     
     Returns:
-        User's ranking information including rank, stats, and percentile
+        User's ranking information including rank, stats, percentile and nearby ranks
     """
     try:
         # Verify user exists
@@ -162,31 +235,19 @@ def get_user_ranking(
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Calculate full leaderboard
-        leaderboard_data = calculate_leaderboard_stats(db, time_period)
-        
-        # Sort by specified metric
-        leaderboard_data.sort(key=lambda x: x[sort_by], reverse=True)
+        # Precomputed rank index (cached)
+        rank_index = get_rank_index(db, sort_by, time_period)
         
         # Find user's position
-        user_rank_data = None
-        total_users = len(leaderboard_data)
-        
-        for idx, entry in enumerate(leaderboard_data, start=1):
-            entry['rank'] = idx
-            if entry['user_id'] == user_id:
-                user_rank_data = entry
-        
+        user_rank_data = rank_index.get(user_id)
         if not user_rank_data:
             raise HTTPException(status_code=404, detail="User has no trades yet")
         
-        # Calculate percentile
-        percentile = ((total_users - user_rank_data['rank']) / total_users * 100) if total_users > 0 else 0
-        
         return {
             'user_rank': user_rank_data,
-            'total_users': total_users,
-            'percentile': round(percentile, 2)
+            'total_users': len(rank_index),
+            'percentile': round(rank_index.percentile(user_id), 2),
+            'nearby_ranks': rank_index.nearby(user_id, nearby)
         }
     
     except HTTPException:
@@ -194,3 +255,12 @@ def get_user_ranking(
     except Exception as e:
         logger.error(f"Error fetching user ranking: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching user ranking: {str(e)}")
+
+
+@router.get("/cache-stats")
+def get_leaderboard_cache_stats():
+    """
+    Get hit/miss counters for the leaderboard cache. The counters are per
+    worker (see worker_pid) even when the cache itself is shared through Redis
+    """
+    return leaderboard_cache.stats()
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+import logging
+
+from app.database import get_db
+from app.models.user import User
+from app.crud.mistake_crud import get_mistake_summary, get_mistake_examples
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# -------------- Mistake Categories --------------
+@router.get("/{user_id}")
+def get_mistakes(
+    user_id: str,
+    examples: int = Query(3, ge=0, le=50),
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a user's mistakes grouped by category (count, total loss, last
+    occurrence and the newest `examples` trades of each).
+
+    With `category` (a category key) returns one page of that category's
+    trades instead; pass the category's next_cursor to continue.
+    """
+    if not db.get(User, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if category is not None:
+        try:
+            trades, next_cursor = get_mistake_examples(db, user_id, category, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"user_id": user_id, "category": category, "examples": trades, "next_cursor": next_cursor}
+
+    return {"user_id": user_id, **get_mistake_summary(db, user_id, examples=examples)}
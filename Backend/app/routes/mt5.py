@@ -3,14 +3,15 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
-from app.services.mt5_service import fetch_mt5_trades
+from app.services.mt5_broker import mt5_terminal_broker
+from app.services.mt5_service import describe_mt5_error
 from app.crud.mt5_crud import create_mt5_credentials, get_mt5_credentials, update_mt5_credentials, delete_mt5_credentials
 from app.schemas.mt5_schema import MT5CredentialsCreate, MT5CredentialsResponse
 
 router = APIRouter()
 
 @router.post("/connect", response_model=dict)
-async def connect_mt5(credentials: MT5CredentialsCreate, db: Session = Depends(get_db)):
+def connect_mt5(credentials: MT5CredentialsCreate, db: Session = Depends(get_db)):
     """
     Connect to MT5 and store/update credentials
     """
@@ -42,7 +43,7 @@ async def connect_mt5(credentials: MT5CredentialsCreate, db: Session = Depends(g
         
         # Test MT5 connection
         try:
-            trades = fetch_mt5_trades(
+            trades = mt5_terminal_broker.fetch_trades(
                 account=credentials.account,
                 password=credentials.password,
                 server=credentials.server,
@@ -52,32 +53,8 @@ async def connect_mt5(credentials: MT5CredentialsCreate, db: Session = Depends(g
         except Exception as mt5_error:
             error_msg = str(mt5_error)
             print(f"❌ MT5 connection error: {error_msg}")
-            # Check for specific MT5 errors
-            if "disconnected" in error_msg.lower() or "connection lost" in error_msg.lower():
-                raise HTTPException(
-                    status_code=503,
-                    detail="MT5 account disconnected from broker server. Please ensure MT5 terminal is connected to the broker server (check the connection status in MT5). Wait for the connection to stabilize, then try again."
-                )
-            elif "IPC timeout" in error_msg or "(-10005" in error_msg:
-                raise HTTPException(
-                    status_code=503,
-                    detail="MT5 terminal is not responding (IPC timeout). This may occur if the account disconnected from the server. Please check MT5 connection status, wait for it to reconnect, then try again."
-                )
-            elif "Authorization failed" in error_msg or "(-6" in error_msg:
-                raise HTTPException(
-                    status_code=401,
-                    detail="MT5 authorization failed. Please check your account number, password, and server name."
-                )
-            elif "initialization failed" in error_msg.lower():
-                raise HTTPException(
-                    status_code=503,
-                    detail="MT5 terminal is not available. Please ensure MetaTrader 5 is installed and running."
-                )
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"MT5 connection failed: {error_msg}"
-                )
+            status_code, detail = describe_mt5_error(error_msg)
+            raise HTTPException(status_code=status_code, detail=detail)
         
         # Check if credentials already exist for this user
         existing_credentials = get_mt5_credentials(db, credentials.user_id)
@@ -162,4 +139,11 @@ async def get_account_info(user_id: str, db: Session = Depends(get_db)):  # ✅
         }
         
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to get account info: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Failed to get account info: {str(e)}")
+
+@router.get("/broker-metrics", response_model=dict)
+async def get_broker_metrics():
+    """
+    Get MT5 terminal broker queue depth, login count and request counters
+    """
+    return mt5_terminal_broker.metrics()
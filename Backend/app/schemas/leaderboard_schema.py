@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -29,6 +29,7 @@ class UserRankingResponse(BaseModel):
     user_rank: LeaderboardEntry
     total_users: int
     percentile: float
+    nearby_ranks: List[LeaderboardEntry] = []
     
     class Config:
         from_attributes = True
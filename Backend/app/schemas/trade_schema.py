@@ -15,6 +15,8 @@ class TradeBase(BaseModel):
     profit_amount: float
     loss_amount: float
     net_profit: Optional[float] = None
+    commission: Optional[float] = 0.0
+    swap: Optional[float] = 0.0
     reason: Optional[str] = None
     mistake: Optional[str] = None
     open_time: datetime
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.trade import Trade
+from app.models.user import User
+from app.models.logs import LoginHistory
+from app.services.cache_service import activity_cache
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Bucket name (a date_trunc field) -> width
+BUCKETS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+# Most buckets one request may span
+MAX_BUCKETS = 2000
+
+
+def bucket_start(moment: datetime, bucket: str) -> datetime:
+    """Start of the bucket containing `moment`, matching PostgreSQL date_trunc (weeks start Monday)"""
+    if bucket == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def get_activity(db: Session, start: datetime, end: datetime, bucket: str = "day",
+                 now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Platform activity per bucket from `start` up to and including the bucket
+    containing `end`: trades closed, distinct active traders, new signups and
+    successful logins. Empty buckets are filled with zeros.
+
+    Buckets that ended before `now` cannot change any more (see
+    activity_cache for the one exception) and are served from the cache;
+    only missing buckets and the open one are counted in the database.
+
+    Raises ValueError for an unknown bucket or a range over MAX_BUCKETS buckets.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket '{bucket}'")
+    now = now or datetime.utcnow()
+    width = BUCKETS[bucket]
+    first, last = bucket_start(start, bucket), bucket_start(end, bucket)
+    if last < first:
+        return []
+    if (last - first) // width >= MAX_BUCKETS:
+        raise ValueError(f"Range spans more than {MAX_BUCKETS} {bucket} buckets")
+
+    starts = [first + width * i for i in range((last - first) // width + 1)]
+    open_bucket = bucket_start(now, bucket)
+
+    counts: Dict[datetime, Dict[str, int]] = {}
+    missing = []
+    for moment in starts:
+        cached = activity_cache.get((bucket, moment)) if moment < open_bucket else None
+        if cached is not None:
+            counts[moment] = cached
+        else:
+            missing.append(moment)
+
+    if missing:
+        # One query over the span of everything not cached
+        counted = _count_buckets(db, bucket, missing[0], missing[-1] + width)
+        for moment in missing:
+            counts[moment] = counted.get(moment, _empty())
+            if moment < open_bucket:
+                activity_cache.set((bucket, moment), counts[moment])
+
+    return [{"date": _label(moment, bucket), "bucket_start": moment, **counts[moment]} for moment in starts]
+
+
+def _empty() -> Dict[str, int]:
+    return {"trades": 0, "active_traders": 0, "new_signups": 0, "logins": 0}
+
+
+def _label(moment: datetime, bucket: str) -> str:
+    return moment.strftime("%Y-%m-%d %H:00" if bucket == "hour" else "%Y-%m-%d")
+
+
+def _count_buckets(db: Session, bucket: str, start: datetime, end: datetime) -> Dict[datetime, Dict[str, int]]:
+    """date_trunc GROUP BY over each source's indexed timestamp, in a single round trip"""
+    def grouped(source: str, column, events, actors):
+        truncated = func.date_trunc(bucket, column)
+        return (
+            select(literal(source).label("source"), truncated.label("bucket"),
+                   events.label("events"), actors.label("actors"))
+            .where(column >= start, column < end)
+            .group_by(truncated)
+        )
+
+    trades = grouped("trades", Trade.close_time, func.count(), func.count(func.distinct(Trade.user_id)))
+    signups = grouped("signups", User.created_at, func.count(), literal(0))
+    logins = grouped("logins", LoginHistory.timestamp, func.count(), literal(0)).where(
+        LoginHistory.status == "success"
+    )
+
+    counted: Dict[datetime, Dict[str, int]] = {}
+    for row in db.execute(union_all(trades, signups, logins)).all():
+        values = counted.setdefault(row.bucket, _empty())
+        if row.source == "trades":
+            values["trades"] = row.events
+            values["active_traders"] = row.actors
+        elif row.source == "signups":
+            values["new_signups"] = row.events
+        else:
+            values["logins"] = row.events
+    return counted
@@ -0,0 +1,239 @@
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sqlalchemy import BigInteger, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.models.trade import Trade
+from app.models.user_trade_stats import UserTradeStats
+from app.services.cache_service import TTLCache
+
+# Results are keyed by the user's trade version, so entries never go stale;
+# the TTL only bounds memory
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", 3600))
+analytics_cache = TTLCache("analytics", ttl=ANALYTICS_CACHE_TTL)
+
+# Sharpe/Sortino are annualized over trading days
+TRADING_DAYS_PER_YEAR = 252
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+class TradeArrays:
+    """A user's trades in close order, one contiguous NumPy array per column"""
+
+    def __init__(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * 7
+        open_time, close_time, net_profit, is_buy, price_open, price_close, stop_loss = columns
+        self.open_time = np.array(open_time, dtype=np.int64).astype("datetime64[us]")
+        self.close_time = np.array(close_time, dtype=np.int64).astype("datetime64[us]")
+        self.net_profit = np.array(net_profit, dtype=np.float64)
+        self.is_buy = np.array(is_buy, dtype=bool)
+        self.price_open = np.array(price_open, dtype=np.float64)
+        self.price_close = np.array(price_close, dtype=np.float64)
+        self.stop_loss = np.array(stop_loss, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.net_profit)
+
+
+def _epoch_us(column):
+    return cast(func.extract("epoch", column) * 1_000_000, BigInteger)
+
+
+def load_trade_arrays(db: Session, user_id: str) -> TradeArrays:
+    # Times come back as integer microseconds: building datetime64 arrays from
+    # Python datetimes would cost more than all the metrics together
+    rows = db.execute(
+        select(
+            # Trades without an open time are bucketed on their close time
+            _epoch_us(func.coalesce(Trade.open_time, Trade.close_time)),
+            _epoch_us(Trade.close_time),
+            func.coalesce(Trade.net_profit, 0.0),
+            func.coalesce(Trade.type == "buy", False),
+            Trade.price_open,
+            Trade.price_close,
+            Trade.stop_loss,
+        )
+        .where(Trade.user_id == user_id, Trade.close_time.isnot(None))
+        .order_by(Trade.close_time, Trade.id)
+    ).all()
+    return TradeArrays(rows)
+
+
+def trade_version(db: Session, user_id: str) -> Optional[str]:
+    """Changes whenever the user's trades do (the stats rollup is updated in the same transaction)"""
+    row = db.execute(
+        select(UserTradeStats.total_trades, UserTradeStats.updated_at)
+        .where(UserTradeStats.user_id == user_id)
+    ).first()
+    if row is None:
+        return None
+    return f"{row.total_trades}:{row.updated_at.isoformat() if row.updated_at else ''}"
+
+
+def get_performance_metrics(db: Session, user_id: str, initial_balance: float = 0.0) -> Dict[str, Any]:
+    """compute_metrics() for a user's trades, memoized per (user, trade version)"""
+    version = trade_version(db, user_id)
+    if version is None:
+        return compute_metrics(TradeArrays([]), initial_balance)
+    return analytics_cache.get_or_compute(
+        (user_id, version, initial_balance),
+        lambda: compute_metrics(load_trade_arrays(db, user_id), initial_balance)
+    )
+
+
+# -------------- Metrics --------------
+def compute_metrics(trades: TradeArrays, initial_balance: float = 0.0) -> Dict[str, Any]:
+    """
+    Performance metrics over a user's closed trades, all whole-array NumPy.
+
+    Args:
+        trades: Trades in close_time order.
+        initial_balance: Account balance before the first trade. With a
+            balance, daily returns are P&L over start-of-day equity;
+            without one, Sharpe/Sortino are computed on daily P&L.
+
+    Returns:
+        dict of summary, risk, streak, R-multiple and time-of-trade breakdowns
+    """
+    pnl = trades.net_profit
+    n = len(pnl)
+    wins = pnl > 0
+    win_count = int(wins.sum())
+    gross_win = float(pnl[wins].sum())
+    gross_loss = float(-pnl[~wins].sum())
+    net = float(pnl.sum())
+
+    drawdown = _drawdown(pnl)
+    return {
+        "total_trades": n,
+        "net_profit": round(net, 2),
+        "win_rate": round(win_count / n * 100, 2) if n else 0.0,
+        "profit_factor": round(gross_win / gross_loss, 4) if gross_loss > 0 else None,
+        "avg_win": round(gross_win / win_count, 2) if win_count else 0.0,
+        "avg_loss": round(gross_loss / (n - win_count), 2) if n - win_count else 0.0,
+        "expectancy": round(net / n, 2) if n else 0.0,
+        "max_drawdown": round(drawdown, 2),
+        "recovery_factor": round(net / drawdown, 4) if drawdown > 0 else None,
+        **_daily_ratios(trades.close_time, pnl, initial_balance),
+        **_streaks(wins),
+        "r_multiples": _r_multiples(trades),
+        "by_hour": _breakdown(trades.open_time, pnl, "hour"),
+        "by_weekday": _breakdown(trades.open_time, pnl, "weekday"),
+    }
+
+
+def _drawdown(pnl: np.ndarray) -> float:
+    """Largest fall of cumulative P&L from a running peak (the curve starts at 0)"""
+    if len(pnl) == 0:
+        return 0.0
+    equity = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0))
+    return float((peak - equity).max())
+
+
+def _daily_ratios(close_time: np.ndarray, pnl: np.ndarray, initial_balance: float) -> Dict[str, Any]:
+    """Annualized Sharpe and Sortino over every weekday (and traded weekend day) in the history"""
+    if len(pnl) == 0:
+        return {"sharpe_ratio": None, "sortino_ratio": None, "trading_days": 0}
+
+    days = close_time.astype("datetime64[D]")
+    first = days[0]
+    index = (days - first).astype(np.int64)
+    daily = np.bincount(index, weights=pnl)
+    traded = np.bincount(index) > 0
+    calendar = first + np.arange(len(daily))
+    keep = np.is_busday(calendar, weekmask="1111100") | traded
+    daily = daily[keep]
+
+    if initial_balance > 0:
+        start_equity = initial_balance + np.concatenate(([0.0], np.cumsum(daily)[:-1]))
+        # Days starting from a blown account have no meaningful return
+        valid = start_equity > 0
+        returns = daily[valid] / start_equity[valid]
+    else:
+        returns = daily
+
+    if len(returns) < 2:
+        return {"sharpe_ratio": None, "sortino_ratio": None, "trading_days": int(len(daily))}
+
+    annualize = np.sqrt(TRADING_DAYS_PER_YEAR)
+    mean = returns.mean()
+    std = returns.std(ddof=1)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+    return {
+        "sharpe_ratio": round(float(mean / std * annualize), 4) if std > 0 else None,
+        "sortino_ratio": round(float(mean / downside * annualize), 4) if downside > 0 else None,
+        "trading_days": int(len(daily)),
+    }
+
+
+def _streaks(wins: np.ndarray) -> Dict[str, int]:
+    """Longest and current win/loss runs from the positions where the outcome flips"""
+    if len(wins) == 0:
+        return {"largest_win_streak": 0, "largest_loss_streak": 0, "current_streak": 0}
+    starts = np.flatnonzero(np.concatenate(([True], wins[1:] != wins[:-1])))
+    lengths = np.diff(np.append(starts, len(wins)))
+    run_wins = wins[starts]
+    current = int(lengths[-1]) if run_wins[-1] else -int(lengths[-1])
+    return {
+        "largest_win_streak": int(lengths[run_wins].max(initial=0)),
+        "largest_loss_streak": int(lengths[~run_wins].max(initial=0)),
+        "current_streak": current,
+    }
+
+
+def _r_multiples(trades: TradeArrays) -> Dict[str, Any]:
+    """
+    Result of each trade in units of its initial risk: price move over the
+    open-to-stop distance. Only trades with a stop on the losing side of the
+    open price count.
+    """
+    direction = np.where(trades.is_buy, 1.0, -1.0)
+    risk = (trades.price_open - trades.stop_loss) * direction
+    valid = (
+        (trades.stop_loss > 0) & (risk > 0)
+        & np.isfinite(trades.price_close) & np.isfinite(trades.price_open)
+    )
+    r = (trades.price_close[valid] - trades.price_open[valid]) * direction[valid] / risk[valid]
+
+    if len(r) == 0:
+        return {"trades": 0, "average": None, "median": None, "total": None, "distribution": []}
+
+    edges = np.array([-np.inf, -2.0, -1.0, 0.0, 1.0, 2.0, 3.0, np.inf])
+    counts, _ = np.histogram(r, bins=edges)
+    labels = ["< -2R", "-2R to -1R", "-1R to 0R", "0R to 1R", "1R to 2R", "2R to 3R", "> 3R"]
+    return {
+        "trades": int(len(r)),
+        "average": round(float(r.mean()), 4),
+        "median": round(float(np.median(r)), 4),
+        "total": round(float(r.sum()), 4),
+        "distribution": [{"bucket": label, "count": int(count)} for label, count in zip(labels, counts)],
+    }
+
+
+def _breakdown(times: np.ndarray, pnl: np.ndarray, unit: str) -> list:
+    """Trade count, P&L and win rate per hour of day (0-23) or weekday (Monday first)"""
+    if unit == "hour":
+        keys = (times.astype("datetime64[h]").astype(np.int64) % 24)
+        labels = list(range(24))
+    else:
+        # 1970-01-01 was a Thursday
+        keys = (times.astype("datetime64[D]").astype(np.int64) + 3) % 7
+        labels = list(WEEKDAYS)
+
+    size = len(labels)
+    counts = np.bincount(keys, minlength=size)
+    totals = np.bincount(keys, weights=pnl, minlength=size)
+    win_counts = np.bincount(keys, weights=(pnl > 0), minlength=size)
+    return [
+        {
+            unit: label,
+            "trades": int(count),
+            "net_profit": round(float(total), 2),
+            "win_rate": round(float(won / count * 100), 2) if count else 0.0,
+        }
+        for label, count, total, won in zip(labels, counts, totals, win_counts)
+    ]
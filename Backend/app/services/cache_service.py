@@ -0,0 +1,198 @@
+import os
+import pickle
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Unset -> per-process memory cache; e.g. "redis://localhost:6379/0" to share
+# the cache between uvicorn workers through any Redis-protocol server
+CACHE_BACKEND_URL = os.getenv("CACHE_BACKEND_URL")
+
+
+# ------------------- Backends -------------------
+class InMemoryCacheBackend:
+    """Process-local backend: a dict of key -> (expires_at, value)"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            _, value = self._data.get(key, (float("inf"), 0))
+            self._data[key] = (float("inf"), value + 1)
+            return value + 1
+
+    def get_counter(self, key: str) -> int:
+        return self.get(key) or 0
+
+
+class RedisCacheBackend:
+    """Shared backend for any Redis-compatible server; values are pickled"""
+
+    def __init__(self, url: str):
+        import redis  # Optional dependency, only needed when CACHE_BACKEND_URL is set
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._client.set(key, pickle.dumps(value), px=max(int(ttl * 1000), 1))
+
+    def delete(self, key: str):
+        self._client.delete(key)
+
+    def incr(self, key: str) -> int:
+        return int(self._client.incr(key))
+
+    def get_counter(self, key: str) -> int:
+        raw = self._client.get(key)
+        return int(raw) if raw is not None else 0
+
+
+def create_cache_backend(url: Optional[str] = CACHE_BACKEND_URL):
+    if url:
+        try:
+            backend = RedisCacheBackend(url)
+            logger.info(f"Using shared cache backend at {url}")
+            return backend
+        except ImportError:
+            logger.warning("redis package not installed - falling back to in-memory cache")
+    return InMemoryCacheBackend()
+
+
+# ------------------- Cache -------------------
+class TTLCache:
+    """
+    Namespaced TTL cache with explicit invalidation.
+
+    Invalidation bumps a generation counter that is part of every key, so it is
+    O(1) and takes effect for every worker sharing the backend.
+    """
+
+    def __init__(self, namespace: str, ttl: float, backend=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = _default_backend()
+        return self._backend
+
+    def _generation_key(self) -> str:
+        return f"{self.namespace}:generation"
+
+    def _key(self, key: Any) -> str:
+        generation = self.backend.get_counter(self._generation_key())
+        return f"{self.namespace}:{generation}:{key!r}"
+
+    def get_or_compute(self, key: Any, compute: Callable[[], Any]) -> Any:
+        full_key = self._key(key)
+        value = self.backend.get(full_key)
+        if value is not None:
+            with self._counter_lock:
+                self.hits += 1
+            return value
+
+        with self._counter_lock:
+            self.misses += 1
+        value = compute()
+        self.backend.set(full_key, value, self.ttl)
+        return value
+
+    def get(self, key: Any) -> Optional[Any]:
+        value = self.backend.get(self._key(key))
+        with self._counter_lock:
+            if value is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return value
+
+    def set(self, key: Any, value: Any):
+        self.backend.set(self._key(key), value, self.ttl)
+
+    def delete(self, key: Any):
+        self.backend.delete(self._key(key))
+
+    def invalidate(self):
+        self.backend.incr(self._generation_key())
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters are kept in this process only: with a shared backend
+        they cover the requests of the worker answering, not the whole cache
+        """
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "backend": type(self.backend).__name__,
+            "ttl_seconds": self.ttl,
+            "counters_scope": "worker",
+            "worker_pid": os.getpid(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 2) if total else 0.0
+        }
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def _default_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_cache_backend()
+        return _backend
+
+
+# ------------------- Shared Caches -------------------
+LEADERBOARD_CACHE_TTL = float(os.getenv("LEADERBOARD_CACHE_TTL", 30))
+
+# Sorted leaderboards keyed by (sort_by, time_period); invalidated whenever
+# trade statistics change (see app.crud.stats_crud)
+leaderboard_cache = TTLCache("leaderboard", ttl=LEADERBOARD_CACHE_TTL)
+
+ACTIVITY_CACHE_TTL = float(os.getenv("ACTIVITY_CACHE_TTL", 24 * 3600))
+
+# Finished platform-activity buckets keyed by (bucket, start); a committed trade
+# evicts the buckets holding its close_time, since MT5 imports backfill old ones
+activity_cache = TTLCache("activity", ttl=ACTIVITY_CACHE_TTL)
+
+ADMIN_STATS_CACHE_TTL = float(os.getenv("ADMIN_STATS_CACHE_TTL", 5))
+
+# Admin dashboard counters; a short TTL absorbs auto-refresh and several open
+# dashboards without noticeably stale numbers
+admin_stats_cache = TTLCache("admin_stats", ttl=ADMIN_STATS_CACHE_TTL)
@@ -0,0 +1,104 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class _Columns:
+    """Struct-of-arrays container: one NumPy array per name in COLUMNS"""
+
+    COLUMNS: Dict[str, Any] = {}
+
+    def __init__(self, **columns: np.ndarray):
+        missing = set(self.COLUMNS) - set(columns)
+        if missing:
+            raise ValueError(f"Missing {type(self).__name__} columns: {sorted(missing)}")
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.asarray(columns[name], dtype=dtype))
+
+    @classmethod
+    def empty(cls):
+        return cls(**{name: np.empty(0, dtype=dtype) for name, dtype in cls.COLUMNS.items()})
+
+    def __len__(self) -> int:
+        return len(getattr(self, next(iter(self.COLUMNS))))
+
+    @classmethod
+    def concat(cls, parts: List["_Columns"]):
+        return cls(**{name: np.concatenate([getattr(part, name) for part in parts]) for name in cls.COLUMNS})
+
+    def take(self, index):
+        """Subset by an integer index, boolean mask or slice"""
+        return type(self)(**{name: getattr(self, name)[index] for name in self.COLUMNS})
+
+
+class DealColumns(_Columns):
+    """
+    Raw MT5 deals (history_deals_get) as columns. type and entry keep the
+    MT5 codes; commission includes the deal fee. Times are naive local
+    datetime64[us], like datetime.fromtimestamp().
+    """
+
+    COLUMNS = {
+        'ticket': np.int64,
+        'position_id': np.int64,
+        'symbol': object,
+        'type': np.int64,
+        'entry': np.int64,
+        'volume': np.float64,
+        'price': np.float64,
+        'commission': np.float64,
+        'swap': np.float64,
+        'profit': np.float64,
+        'tp': np.float64,
+        'sl': np.float64,
+        'time': 'datetime64[us]',
+    }
+
+
+class PositionColumns(_Columns):
+    """
+    Closed positions rebuilt from deals (see app.services.position_engine),
+    one per future trades row. ticket is the broker ticket stored for the
+    trade; profit is the gross result and net = profit + commission + swap.
+
+    Produced by fetch_mt5_trades(..., columnar=True) and consumed by
+    ingest_mt5_deals, so large histories never become per-row dicts.
+    """
+
+    COLUMNS = {
+        'ticket': np.int64,
+        'symbol': object,
+        'type': object,
+        'volume': np.float64,
+        'price_open': np.float64,
+        'price_close': np.float64,
+        'tp': np.float64,
+        'sl': np.float64,
+        'profit': np.float64,
+        'commission': np.float64,
+        'swap': np.float64,
+        'open_time': 'datetime64[us]',
+        'close_time': 'datetime64[us]',
+    }
+
+    def __init__(self, resume_point: Optional[Tuple[datetime, int]] = None, **columns: np.ndarray):
+        super().__init__(**columns)
+        # Where the next incremental sync must restart: the first deal of the
+        # oldest position still open, else the newest deal seen
+        self.resume_point = resume_point
+
+    def take(self, index):
+        subset = super().take(index)
+        subset.resume_point = self.resume_point
+        return subset
+
+    @property
+    def net(self) -> np.ndarray:
+        return self.profit + self.commission + self.swap
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Plain dicts, one per position ('time' is the close time)"""
+        lists = {name: getattr(self, name).tolist() for name in self.COLUMNS}
+        lists['time'] = lists['close_time']
+        return [dict(zip(lists, values)) for values in zip(*lists.values())]
@@ -0,0 +1,126 @@
+from typing import Any, Dict
+
+import numpy as np
+
+# Downsampling methods for equity_curve()
+DOWNSAMPLE_METHODS = ("lttb", "bucket")
+
+
+def equity_curve(close_times: np.ndarray, net_profits: np.ndarray, points: int = 500,
+                 method: str = "lttb", initial_balance: float = 0.0) -> Dict[str, Any]:
+    """
+    Cumulative P&L curve and drawdown statistics for trades in close order.
+
+    Equity, running peak and drawdown are computed with whole-array NumPy
+    operations; the series is then downsampled to at most `points` points
+    ("lttb": Largest-Triangle-Three-Buckets, keeps the visual shape;
+    "bucket": the low and high of each fixed-size bucket, keeps extremes).
+    Drawdown percentages are relative to initial_balance + peak P&L.
+
+    Args:
+        close_times: datetime64 array, ascending.
+        net_profits: float array aligned with close_times.
+        points: Maximum number of points returned.
+        method: One of DOWNSAMPLE_METHODS.
+        initial_balance: Account balance before the first trade.
+
+    Returns:
+        dict with the downsampled series and max/current drawdown figures.
+    """
+    n = len(net_profits)
+    if n == 0:
+        return {
+            "total_trades": 0, "method": method, "series": [], "final_equity": 0.0,
+            "max_drawdown": 0.0, "max_drawdown_pct": None, "max_drawdown_start": None,
+            "max_drawdown_end": None, "max_drawdown_duration_days": 0.0, "current_drawdown": 0.0,
+        }
+
+    equity = np.cumsum(net_profits, dtype=np.float64)
+    # The curve starts flat at 0, so a first losing trade is already a drawdown
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0))
+    drawdown = peak - equity
+
+    # Index of the peak each point is measured against
+    index = np.arange(n)
+    at_peak = (equity >= peak)
+    peak_index = np.maximum.accumulate(np.where(at_peak, index, -1))
+
+    trough = int(np.argmax(drawdown))
+    max_drawdown = float(drawdown[trough])
+    start_index = int(peak_index[trough])
+
+    # Longest time spent below a previous peak (ongoing drawdowns count up to the last trade)
+    times = close_times.astype("datetime64[s]").astype(np.int64)
+    peak_times = np.where(peak_index >= 0, times[np.maximum(peak_index, 0)], times[0])
+    underwater = np.where(drawdown > 0, times - peak_times, 0)
+    max_duration_days = float(underwater.max()) / 86400
+
+    base = initial_balance + float(peak[trough])
+    selected = _downsample(index, equity, points, method)
+
+    return {
+        "total_trades": n,
+        "method": method,
+        "series": [
+            {"time": close_times[i].item().isoformat(), "equity": round(float(equity[i]), 2),
+             "drawdown": round(float(drawdown[i]), 2)}
+            for i in selected.tolist()
+        ],
+        "final_equity": round(float(equity[-1]), 2),
+        "max_drawdown": round(max_drawdown, 2),
+        "max_drawdown_pct": round(max_drawdown / base * 100, 2) if base > 0 else None,
+        "max_drawdown_start": close_times[start_index].item().isoformat() if start_index >= 0 and max_drawdown > 0 else None,
+        "max_drawdown_end": close_times[trough].item().isoformat() if max_drawdown > 0 else None,
+        "max_drawdown_duration_days": round(max_duration_days, 2),
+        "current_drawdown": round(float(drawdown[-1]), 2),
+    }
+
+
+def _downsample(x: np.ndarray, y: np.ndarray, points: int, method: str) -> np.ndarray:
+    """Indices of the points to keep, ascending; always includes the first and last point"""
+    n = len(y)
+    if n <= points or points < 3:
+        return x if n <= points else np.array([0, n - 1])
+    if method == "bucket":
+        return _bucket_extremes(y, points)
+    return _lttb(x.astype(np.float64), y, points)
+
+
+def _bucket_extremes(y: np.ndarray, points: int) -> np.ndarray:
+    """Min and max of each of points // 2 equal-width buckets"""
+    n = len(y)
+    buckets = max((points - 2) // 2, 1)
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    keep = [0]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop <= start:
+            continue
+        segment = y[start:stop]
+        keep.extend(sorted((start + int(np.argmin(segment)), start + int(np.argmax(segment)))))
+    keep.append(n - 1)
+    return np.unique(np.array(keep))
+
+
+def _lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets (Steinarsson, 2013); one vectorized step per bucket"""
+    n = len(y)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(points - 2):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Average of the next bucket (or the last point) is the third triangle corner
+        next_start, next_stop = stop, edges[i + 2] if i + 2 < len(edges) else n
+        if next_stop <= next_start:
+            next_start, next_stop = n - 1, n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+
+        bx, by = x[start:stop], y[start:stop]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return np.unique(keep)
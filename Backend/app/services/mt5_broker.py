@@ -0,0 +1,132 @@
+import threading
+import logging
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from app.services.deal_columns import DealColumns
+from app.services.mt5_service import fetch_mt5_trades
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class _FetchRequest:
+    def __init__(self, account: int, password: str, server: str, days: int, date_from: Optional[datetime],
+                 columnar: bool):
+        self.account = account
+        self.password = password
+        self.server = server
+        self.days = days
+        self.date_from = date_from
+        self.columnar = columnar
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MT5TerminalBroker:
+    """
+    Sole owner of the MetaTrader5 terminal.
+
+    The MetaTrader5 module is process-global: two threads using it at once can
+    log the terminal into another account in the middle of a fetch. All terminal
+    work is queued here and executed by one dedicated thread. Queued requests
+    are grouped by (account, server) and each group runs back to back, so an
+    account is logged in once per group instead of once per request. Groups are
+    served in order of their oldest request, so no account starves.
+    """
+
+    def __init__(self):
+        self._pending: "OrderedDict[Tuple[int, str], Deque[_FetchRequest]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._current_account: Optional[Tuple[int, str]] = None
+
+        # Metrics
+        self.logins = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+
+    # ------------------- Public API -------------------
+    def submit(self, account: int, password: str, server: str, days: int = 365,
+               date_from: Optional[datetime] = None, columnar: bool = False) -> Future:
+        """Queue a deal fetch; the returned future resolves to the deal list"""
+        request = _FetchRequest(int(account), password, server, days, date_from, columnar)
+        with self._cond:
+            self._ensure_worker()
+            self._pending.setdefault((request.account, server), deque()).append(request)
+            self._cond.notify()
+        return request.future
+
+    def fetch_trades(self, account: int, password: str, server: str, days: int = 365,
+                     date_from: Optional[datetime] = None,
+                     columnar: bool = False) -> Union[List[Dict[str, Any]], DealColumns]:
+        """Blocking fetch through the broker; same contract as fetch_mt5_trades"""
+        return self.submit(account, password, server, days, date_from, columnar).result()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                "queue_depth": sum(len(requests) for requests in self._pending.values()),
+                "queued_accounts": len(self._pending),
+                "current_account": f"{self._current_account[0]}@{self._current_account[1]}" if self._current_account else None,
+                "logins": self.logins,
+                "batches": self.batches,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    # ------------------- Worker -------------------
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="mt5-terminal-broker", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> Tuple[Tuple[int, str], List[_FetchRequest]]:
+        """Take every queued request of the account whose oldest request has waited longest"""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            key, requests = self._pending.popitem(last=False)
+            return key, list(requests)
+
+    def _on_login(self):
+        with self._cond:
+            self.logins += 1
+
+    def _run(self):
+        while True:
+            key, batch = self._next_batch()
+            with self._cond:
+                self._current_account = key
+                self.batches += 1
+            logger.info(f"MT5 broker running {len(batch)} request(s) for {key[0]}@{key[1]}")
+
+            for request in batch:
+                if not request.future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    trades = fetch_mt5_trades(
+                        account=request.account,
+                        password=request.password,
+                        server=request.server,
+                        days=request.days,
+                        date_from=request.date_from,
+                        on_login=self._on_login,
+                        columnar=request.columnar
+                    )
+                    with self._cond:
+                        self.completed += 1
+                    request.future.set_result(trades)
+                except Exception as e:
+                    with self._cond:
+                        self.failed += 1
+                    request.future.set_exception(e)
+
+
+# Process-wide broker; the terminal must not be touched outside of it
+mt5_terminal_broker = MT5TerminalBroker()
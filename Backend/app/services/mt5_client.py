@@ -0,0 +1,275 @@
+import os
+import random
+import threading
+import time
+import zlib
+import logging
+from collections import namedtuple
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# "metatrader5" (default) drives a real terminal through the Windows-only
+# MetaTrader5 package; "fake" uses FakeMT5Client for Linux, CI and load tests
+MT5_CLIENT = os.getenv("MT5_CLIENT", "metatrader5")
+
+# Fake terminal settings
+MT5_FAKE_DEALS = int(os.getenv("MT5_FAKE_DEALS", 500))
+MT5_FAKE_HISTORY_DAYS = int(os.getenv("MT5_FAKE_HISTORY_DAYS", 365))
+MT5_FAKE_LATENCY_MS = float(os.getenv("MT5_FAKE_LATENCY_MS", 0))
+MT5_FAKE_IPC_TIMEOUT_RATE = float(os.getenv("MT5_FAKE_IPC_TIMEOUT_RATE", 0))
+MT5_FAKE_SEED = int(os.getenv("MT5_FAKE_SEED", 0))
+
+# MT5 error codes
+IPC_TIMEOUT = -10005
+AUTH_FAILED = -6
+
+
+class MT5Client(Protocol):
+    """
+    The subset of the MetaTrader5 module API used by mt5_service.
+
+    delay_scale multiplies the settle/retry sleeps in mt5_service; the real
+    terminal needs them, a fake terminal does not.
+    """
+    delay_scale: float
+
+    def initialize(self) -> bool: ...
+    def terminal_info(self) -> Optional[Any]: ...
+    def login(self, login: int, password: str, server: str) -> bool: ...
+    def account_info(self) -> Optional[Any]: ...
+    def history_deals_get(self, date_from: datetime, date_to: datetime) -> Optional[Tuple[Any, ...]]: ...
+    def history_deals_for_position(self, position_id: int) -> Optional[Tuple[Any, ...]]: ...
+    def last_error(self) -> Tuple[int, str]: ...
+
+
+# ------------------- Real Terminal -------------------
+class MetaTrader5Client:
+    """Adapter over the MetaTrader5 package, imported on first use"""
+
+    delay_scale = 1.0
+
+    def __init__(self):
+        import MetaTrader5  # Windows-only, so never imported at module level
+        self._mt5 = MetaTrader5
+
+    def initialize(self) -> bool:
+        return self._mt5.initialize()
+
+    def terminal_info(self):
+        return self._mt5.terminal_info()
+
+    def login(self, login: int, password: str, server: str) -> bool:
+        return self._mt5.login(login, password=password, server=server)
+
+    def account_info(self):
+        return self._mt5.account_info()
+
+    def history_deals_get(self, date_from: datetime, date_to: datetime):
+        return self._mt5.history_deals_get(date_from, date_to)
+
+    def history_deals_for_position(self, position_id: int):
+        return self._mt5.history_deals_get(position=position_id)
+
+    def last_error(self) -> Tuple[int, str]:
+        return self._mt5.last_error()
+
+
+# ------------------- Fake Terminal -------------------
+# Same fields as MetaTrader5's TradeDeal / AccountInfo (the ones we read)
+FakeDeal = namedtuple("FakeDeal", [
+    "ticket", "order", "time", "type", "entry", "position_id",
+    "volume", "price", "commission", "swap", "fee", "profit", "symbol",
+])
+FakeAccountInfo = namedtuple("FakeAccountInfo", ["login", "server", "balance"])
+
+FAKE_SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "US30", "BTCUSD"]
+
+# MT5 deal type / entry constants
+DEAL_TYPE_BUY, DEAL_TYPE_SELL, DEAL_TYPE_BALANCE = 0, 1, 2
+DEAL_ENTRY_IN, DEAL_ENTRY_OUT, DEAL_ENTRY_INOUT = 0, 1, 2
+
+
+class FakeMT5Client:
+    """
+    In-process stand-in for a MetaTrader5 terminal.
+
+    Every (account, server) gets a deterministic history of `deals_per_account`
+    positions spread over `history_days` days before `anchor`: an opening
+    balance deal, then per position an IN deal and one OUT deal, two partial
+    OUTs, or (netting style) an INOUT reversal followed by an OUT. Deals carry
+    commission and swap like a real account. Each call sleeps `latency` seconds
+    and fails with an IPC timeout (-10005) with probability
+    `ipc_timeout_rate`, drawn from a seeded generator so runs are repeatable.
+    Any non-empty password is accepted.
+    """
+
+    def __init__(self, deals_per_account: int = MT5_FAKE_DEALS, history_days: int = MT5_FAKE_HISTORY_DAYS,
+                 latency: float = MT5_FAKE_LATENCY_MS / 1000, ipc_timeout_rate: float = MT5_FAKE_IPC_TIMEOUT_RATE,
+                 seed: int = MT5_FAKE_SEED, anchor: Optional[datetime] = None, delay_scale: float = 0.0):
+        self.deals_per_account = deals_per_account
+        self.history_days = history_days
+        self.latency = latency
+        self.ipc_timeout_rate = ipc_timeout_rate
+        self.seed = seed
+        # Default anchor is the start of today, so histories are stable within a day
+        self.anchor = anchor or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.delay_scale = delay_scale
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._initialized = False
+        self._account: Optional[Tuple[int, str]] = None
+        self._last_error: Tuple[int, str] = (1, "Success")
+        self._histories: Dict[Tuple[int, str], Tuple[FakeDeal, ...]] = {}
+        self.calls: Dict[str, int] = {}
+
+    # ------------------- Terminal API -------------------
+    def initialize(self) -> bool:
+        if not self._call("initialize"):
+            return False
+        self._initialized = True
+        return True
+
+    def terminal_info(self):
+        if not self._initialized:
+            self._set_error(-10004, "No IPC connection")
+            return None
+        return {"connected": True, "name": "FakeMT5"}
+
+    def login(self, login: int, password: str, server: str) -> bool:
+        if not self._call("login"):
+            return False
+        if not password:
+            self._set_error(AUTH_FAILED, "Authorization failed")
+            return False
+        with self._lock:
+            self._account = (int(login), server)
+        return True
+
+    def account_info(self):
+        if not self._call("account_info"):
+            return None
+        if self._account is None:
+            self._set_error(AUTH_FAILED, "Authorization failed")
+            return None
+        login, server = self._account
+        return FakeAccountInfo(login=login, server=server, balance=10000.0)
+
+    def history_deals_get(self, date_from: datetime, date_to: datetime):
+        if not self._call("history_deals_get"):
+            return None
+        if self._account is None:
+            self._set_error(AUTH_FAILED, "Authorization failed")
+            return None
+        start, end = date_from.timestamp(), date_to.timestamp()
+        return tuple(deal for deal in self._history(self._account) if start <= deal.time <= end)
+
+    def history_deals_for_position(self, position_id: int):
+        if not self._call("history_deals_for_position"):
+            return None
+        if self._account is None:
+            self._set_error(AUTH_FAILED, "Authorization failed")
+            return None
+        return tuple(deal for deal in self._history(self._account) if deal.position_id == position_id)
+
+    def last_error(self) -> Tuple[int, str]:
+        return self._last_error
+
+    # ------------------- Helpers -------------------
+    def _call(self, name: str) -> bool:
+        """Simulate latency and random IPC timeouts; False means the call failed"""
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            timed_out = self.ipc_timeout_rate > 0 and self._random.random() < self.ipc_timeout_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if timed_out:
+            self._set_error(IPC_TIMEOUT, "IPC timeout")
+            return False
+        self._set_error(1, "Success")
+        return True
+
+    def _set_error(self, code: int, message: str):
+        self._last_error = (code, message)
+
+    def _history(self, key: Tuple[int, str]) -> Tuple[FakeDeal, ...]:
+        with self._lock:
+            if key not in self._histories:
+                self._histories[key] = self._generate_history(key)
+            return self._histories[key]
+
+    def _generate_history(self, key: Tuple[int, str]) -> Tuple[FakeDeal, ...]:
+        login, server = key
+        rng = random.Random(zlib.crc32(f"{self.seed}:{login}@{server}".encode()))
+        end = self.anchor.timestamp()
+        span = self.history_days * 86400
+        tickets = iter(range((zlib.crc32(f"{login}@{server}".encode()) % 1000) * 10_000_000 + 1, 2 ** 62))
+
+        def deal(deal_time: int, side: int, entry: int, position_id: int, volume: float, price: float,
+                 profit: float = 0.0, swap: float = 0.0, symbol: str = "") -> FakeDeal:
+            ticket = next(tickets)
+            return FakeDeal(ticket, ticket, deal_time, side, entry, position_id, volume, price,
+                            round(-3.5 * volume, 2), swap, 0.0, profit, symbol)
+
+        deals: List[FakeDeal] = [
+            deal(int(end - span) - 3600, DEAL_TYPE_BALANCE, DEAL_ENTRY_IN, 0, 0.0, 0.0, profit=10000.0)
+        ]
+        for i in range(self.deals_per_account):
+            position_id = next(tickets)
+            symbol = rng.choice(FAKE_SYMBOLS)
+            side = rng.choice((DEAL_TYPE_BUY, DEAL_TYPE_SELL))
+            volume = rng.choice((0.02, 0.1, 0.5, 1.0))
+            price = round(rng.uniform(1.0, 2000.0), 5)
+            deal_time = int(end - span + span * i / max(self.deals_per_account, 1))
+
+            deals.append(deal(deal_time, side, DEAL_ENTRY_IN, position_id, volume, price, symbol=symbol))
+            shape = rng.random()
+            exits = [(volume, DEAL_ENTRY_OUT)]
+            if shape < 0.15:
+                exits = [(round(volume / 2, 2), DEAL_ENTRY_OUT), (round(volume - round(volume / 2, 2), 2), DEAL_ENTRY_OUT)]
+            elif shape < 0.20:
+                exits = [(volume * 2, DEAL_ENTRY_INOUT), (volume, DEAL_ENTRY_OUT)]
+
+            for volume_out, entry in exits:
+                deal_time += rng.randint(60, 3 * 3600)
+                price = round(price * (1 + rng.gauss(0, 0.002)), 5)
+                side = 1 - side
+                swap = round(rng.uniform(-2.0, 0.5), 2) if rng.random() < 0.3 else 0.0
+                deals.append(deal(deal_time, side, entry, position_id, volume_out, price,
+                                  profit=round(rng.gauss(5, 40), 2), swap=swap, symbol=symbol))
+
+        deals.sort(key=lambda deal: (deal.time, deal.ticket))
+        return tuple(deals)
+
+
+# ------------------- Factory -------------------
+_client = None
+_client_lock = threading.Lock()
+
+def create_mt5_client(kind: str = MT5_CLIENT) -> MT5Client:
+    if kind == "fake":
+        logger.info("Using fake MT5 terminal")
+        return FakeMT5Client()
+    if kind == "metatrader5":
+        return MetaTrader5Client()
+    raise ValueError(f"Unknown MT5_CLIENT {kind!r}; expected 'metatrader5' or 'fake'")
+
+
+def get_mt5_client() -> MT5Client:
+    """Process-wide client chosen by MT5_CLIENT, created on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = create_mt5_client()
+        return _client
+
+
+def set_mt5_client(client: Optional[MT5Client]):
+    """Swap the process-wide client (e.g. a FakeMT5Client configured by a load test)"""
+    global _client
+    with _client_lock:
+        _client = client
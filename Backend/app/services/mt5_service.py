@@ -1,14 +1,28 @@
-import MetaTrader5 as mt5
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Union
 import logging
+import os
 import time
+import numpy as np
+
+from app.services.deal_columns import DealColumns, PositionColumns
+from app.services.position_engine import reconstruct_positions, find_orphaned_positions
+from app.services.mt5_client import MT5Client, get_mt5_client
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-def _ensure_mt5_initialized(max_retries: int = 3, retry_delay: float = 2.0) -> bool:
+# Incremental syncs re-read this much history before the stored watermark, so
+# deals the broker reports late are still picked up (duplicates are deduped on ingest)
+SYNC_OVERLAP = timedelta(minutes=int(os.getenv("MT5_SYNC_OVERLAP_MINUTES", 60)))
+
+def _pause(mt5: MT5Client, seconds: float):
+    """Sleep to let the terminal settle; scaled down (usually to zero) by fake clients"""
+    if mt5.delay_scale:
+        time.sleep(seconds * mt5.delay_scale)
+
+def _ensure_mt5_initialized(mt5: MT5Client, max_retries: int = 3, retry_delay: float = 2.0) -> bool:
     """
     Ensure MT5 is properly initialized with retry logic.
     """
@@ -21,7 +35,7 @@ def _ensure_mt5_initialized(max_retries: int = 3, retry_delay: float = 2.0) -> b
         # Try to initialize
         if mt5.initialize():
             # Wait a bit for initialization to complete
-            time.sleep(0.5)
+            _pause(mt5, 0.5)
             # Verify initialization
             if mt5.terminal_info() is not None:
                 print(f"✅ MT5 initialized successfully")
@@ -31,26 +45,38 @@ def _ensure_mt5_initialized(max_retries: int = 3, retry_delay: float = 2.0) -> b
         print(f"⚠️  MT5 initialization attempt {attempt + 1}/{max_retries} failed: {error}")
         
         if attempt < max_retries - 1:
-            time.sleep(retry_delay)
+            _pause(mt5, retry_delay)
     
     return False
 
-def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365) -> List[Dict[str, Any]]:
+def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365,
+                     date_from: Optional[datetime] = None,
+                     on_login: Optional[Callable[[], None]] = None,
+                     columnar: bool = False) -> Union[List[Dict[str, Any]], PositionColumns]:
     """
-    Fetch trades from MT5 and return as list of dictionaries.
+    Fetch closed positions from MT5 and return as list of dictionaries.
+    Deals are fetched from date_from when given, otherwise for the last `days` days,
+    and paired into positions by app.services.position_engine.
     Handles IPC timeout errors with retry logic.
+    
+    This drives the process-global terminal directly - call it through
+    app.services.mt5_broker.mt5_terminal_broker so only one fetch runs at a time.
+    on_login is called whenever the terminal had to log into the account.
+    With columnar=True the positions come back as a PositionColumns instead of dicts.
+    The terminal is the MT5Client selected by MT5_CLIENT (see app.services.mt5_client).
     """
     print(f"🔌 Attempting MT5 connection to {account}@{server}")
+    mt5 = get_mt5_client()
     
     # Ensure MT5 is initialized with retry
-    if not _ensure_mt5_initialized():
+    if not _ensure_mt5_initialized(mt5):
         error_msg = f"MT5 initialization failed after retries. Error: {mt5.last_error()}"
         print(f"❌ {error_msg}")
         logger.error(error_msg)
         raise Exception(error_msg)
     
     # Small delay to ensure connection is stable
-    time.sleep(0.3)
+    _pause(mt5, 0.3)
 
     try:
         # First, check if account is already logged in
@@ -77,6 +103,8 @@ def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365)
                 authorized = mt5.login(account, password=password, server=server)
                 
                 if authorized:
+                    if on_login:
+                        on_login()
                     break
                 
                 error = mt5.last_error()
@@ -86,7 +114,7 @@ def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365)
                 if error_code == -10005:
                     print(f"⚠️  IPC timeout on login attempt {login_attempt + 1}, retrying...")
                     if login_attempt < max_login_retries - 1:
-                        time.sleep(2.0)  # Wait longer for IPC timeout
+                        _pause(mt5, 2.0)  # Wait longer for IPC timeout
                         continue
                     else:
                         error_msg = "MT5 IPC timeout: Terminal is not responding. Please ensure MetaTrader 5 is running and not frozen."
@@ -107,7 +135,7 @@ def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365)
                 raise Exception(error_msg)
             
             # Small delay after login to let connection stabilize
-            time.sleep(0.5)
+            _pause(mt5, 0.5)
         
         # Get account info with retry for IPC timeout
         account_info = None
@@ -120,7 +148,7 @@ def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365)
             if isinstance(error, tuple) and error[0] == -10005:
                 print(f"⚠️  IPC timeout getting account info, retrying...")
                 if info_attempt < 1:
-                    time.sleep(2.0)
+                    _pause(mt5, 2.0)
                     continue
                 else:
                     error_msg = "MT5 IPC timeout: Failed to get account info. Terminal may be busy."
@@ -141,7 +169,7 @@ def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365)
         print(f"   Server: {account_info.server}")
         
         # Verify connection is stable before proceeding
-        time.sleep(1.0)  # Wait longer to ensure connection is stable
+        _pause(mt5, 1.0)  # Wait longer to ensure connection is stable
         
         # Check if still connected before fetching history
         account_info_check = mt5.account_info()
@@ -164,7 +192,8 @@ def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365)
         print(f"✅ Connection verified. Server: {account_info_check.server}")
         
         # Fetch deals with retry for IPC timeout
-        utc_from = datetime.now() - timedelta(days=days)
+        utc_from = date_from or (datetime.now() - timedelta(days=days))
+        print(f"📅 Fetching deals since {utc_from}")
         deals = None
         
         for deals_attempt in range(3):  # Increased retries
@@ -189,7 +218,7 @@ def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365)
             if error_code == -10005:
                 print(f"⚠️  IPC timeout fetching deals (attempt {deals_attempt + 1}/3), retrying...")
                 if deals_attempt < 2:
-                    time.sleep(3.0)  # Wait longer for IPC timeout
+                    _pause(mt5, 3.0)  # Wait longer for IPC timeout
                     # Try to re-verify connection
                     connection_check = mt5.account_info()
                     if connection_check is None:
@@ -219,31 +248,27 @@ def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365)
         
         if len(deals) == 0:
             print("ℹ️  No trades found in history")
-            return []
+            return PositionColumns.empty() if columnar else []
         
-        print(f"📊 Found {len(deals)} trades")
+        print(f"📊 Found {len(deals)} deals")
         
-        trades = []
-        for deal in deals:
-            try:
-                trade = {
-                    'ticket': deal.ticket,
-                    'symbol': deal.symbol,
-                    'volume': deal.volume,
-                    'price_open': getattr(deal, 'price_open', deal.price),
-                    'price_close': getattr(deal, 'price_close', deal.price),
-                    'type': 'buy' if deal.type == 0 else 'sell',
-                    'profit': deal.profit,
-                    'time': datetime.fromtimestamp(deal.time) if deal.time else datetime.now(),
-                    'tp': getattr(deal, 'tp', 0.0),
-                    'sl': getattr(deal, 'sl', 0.0)
-                }
-                trades.append(trade)
-            except Exception as e:
-                logger.warning(f"Error processing deal {getattr(deal, 'ticket', 'unknown')}: {str(e)}")
-                continue
+        columns = mt5_deals_to_columns(deals)
         
-        return trades
+        # Positions closed in the window but opened before it need their opening deals too
+        orphaned = find_orphaned_positions(columns)
+        if orphaned:
+            print(f"🔎 Fetching opening deals for {len(orphaned)} positions opened before {utc_from}")
+            extra = []
+            for position_id in orphaned:
+                position_deals = mt5.history_deals_for_position(position_id)
+                if position_deals:
+                    extra.extend(position_deals)
+            if extra:
+                columns = DealColumns.concat([mt5_deals_to_columns(extra), columns])
+        
+        positions = reconstruct_positions(columns)
+        print(f"📊 Rebuilt {len(positions)} closed positions")
+        return positions if columnar else positions.to_dicts()
         
     except Exception as e:
         error_msg = str(e)
@@ -260,11 +285,95 @@ def fetch_mt5_trades(account: int, password: str, server: str, days: int = 365)
         print("✅ MT5 operation completed (keeping terminal connection active)")
 
 
-def calculate_profit_loss(profit: float) -> tuple:
+def mt5_deals_to_columns(deals) -> DealColumns:
+    """
+    Convert the tuple of TradeDeal namedtuples from history_deals_get into
+    columns in one pass: a structured array is built from the tuples and
+    timestamps are converted over the whole array.
+    """
+    fields = deals[0]._fields
+    raw = np.array(list(deals), dtype=[(field, _RAW_DEAL_DTYPES.get(field, object)) for field in fields])
+    n = len(raw)
+
+    def column(name: str, default: float = 0.0) -> np.ndarray:
+        return np.nan_to_num(raw[name].astype(np.float64)) if name in fields else np.full(n, default)
+
+    return DealColumns(
+        ticket=raw['ticket'],
+        position_id=raw['position_id'] if 'position_id' in fields else np.zeros(n, dtype=np.int64),
+        symbol=raw['symbol'],
+        type=raw['type'],
+        entry=raw['entry'] if 'entry' in fields else np.zeros(n, dtype=np.int64),
+        volume=column('volume'),
+        price=column('price'),
+        commission=column('commission') + column('fee'),
+        swap=column('swap'),
+        profit=column('profit'),
+        tp=column('tp'),
+        sl=column('sl'),
+        time=_local_datetimes(raw['time']),
+    )
+
+
+# numpy dtypes for the TradeDeal fields we read; anything else is kept as object
+_RAW_DEAL_DTYPES = {
+    'ticket': np.int64, 'order': np.int64, 'time': np.int64, 'time_msc': np.int64,
+    'type': np.int64, 'entry': np.int64, 'magic': np.int64, 'position_id': np.int64,
+    'reason': np.int64, 'volume': np.float64, 'price': np.float64, 'commission': np.float64,
+    'swap': np.float64, 'profit': np.float64, 'fee': np.float64,
+}
+
+
+def _local_datetimes(seconds: np.ndarray) -> np.ndarray:
+    """
+    Vectorized datetime.fromtimestamp(): epoch seconds -> naive local datetime64.
+    The UTC offset is looked up once per distinct day, and per hour only on
+    days where it changes (DST); a zero time means "now", as before.
+    """
+    days, day_index = np.unique(seconds // 86400, return_inverse=True)
+    day_index = day_index.reshape(-1)
+    start_offsets = np.array([_utc_offset_seconds(int(day) * 86400) for day in days], dtype=np.int64)
+    end_offsets = np.array([_utc_offset_seconds(int(day + 1) * 86400) for day in days], dtype=np.int64)
+    offsets = start_offsets[day_index]
+
+    changing = (start_offsets != end_offsets)[day_index]
+    if changing.any():
+        hours, hour_index = np.unique(seconds[changing] // 3600, return_inverse=True)
+        hour_offsets = np.array([_utc_offset_seconds(int(hour) * 3600) for hour in hours], dtype=np.int64)
+        offsets[changing] = hour_offsets[hour_index.reshape(-1)]
+
+    local = (seconds + offsets).astype('datetime64[s]').astype('datetime64[us]')
+    return np.where(seconds > 0, local, np.datetime64(datetime.now(), 'us'))
+
+
+def _utc_offset_seconds(timestamp: int) -> int:
+    return int(datetime.fromtimestamp(timestamp).astimezone().utcoffset().total_seconds())
+
+
+def calculate_profit_loss(profit):
     """
     Calculate separate profit and loss amounts.
+    Works on a single value or element-wise on a NumPy array.
     """
+    if isinstance(profit, np.ndarray):
+        return np.where(profit >= 0, profit, 0.0), np.where(profit < 0, -profit, 0.0)
     if profit >= 0:
         return profit, 0.0  # profit_amount, loss_amount
     else:
         return 0.0, abs(profit)  # profit_amount, loss_amount
+
+
+def describe_mt5_error(error_msg: str) -> tuple:
+    """
+    Map an MT5 fetch error message to an HTTP status code and a user-facing message.
+    """
+    if "disconnected" in error_msg.lower() or "connection lost" in error_msg.lower():
+        return 503, "MT5 account disconnected from broker server. Please ensure MT5 terminal is connected to the broker server (check the connection status in MT5). Wait a few seconds for the connection to stabilize, then try again."
+    elif "IPC timeout" in error_msg or "(-10005" in error_msg:
+        return 503, "MT5 terminal is not responding (IPC timeout). This may occur if the account disconnected from the server. Please check MT5 connection status, wait for it to reconnect, then try again."
+    elif "Authorization failed" in error_msg or "(-6" in error_msg:
+        return 401, "MT5 authorization failed. Please check your account number, password, and server name."
+    elif "initialization failed" in error_msg.lower():
+        return 503, "MT5 terminal is not available. Please ensure MetaTrader 5 is installed and running."
+    else:
+        return 400, f"Failed to fetch trades from MT5: {error_msg}"
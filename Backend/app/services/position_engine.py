@@ -0,0 +1,164 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app.services.deal_columns import DealColumns, PositionColumns
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# MT5 deal types that move a position; balance, credit, charges etc. are ignored
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+TRADE_DEAL_TYPES = (DEAL_TYPE_BUY, DEAL_TYPE_SELL)
+
+# MT5 deal entries
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+DEAL_ENTRY_INOUT = 2
+DEAL_ENTRY_OUT_BY = 3
+CLOSING_ENTRIES = (DEAL_ENTRY_OUT, DEAL_ENTRY_INOUT, DEAL_ENTRY_OUT_BY)
+
+# Remaining volume below this counts as flat
+VOLUME_EPSILON = 1e-8
+
+
+class _Leg:
+    """One open position (or one direction of a reversed netting position) being accumulated"""
+
+    __slots__ = ('ticket', 'side', 'symbol', 'tp', 'sl', 'first_deal', 'open_time', 'close_time',
+                 'in_volume', 'in_notional', 'out_volume', 'out_notional', 'profit', 'commission', 'swap')
+
+    def __init__(self, ticket: int, side: str, symbol: str, time: datetime, deal_ticket: int, tp: float, sl: float):
+        self.ticket = ticket
+        self.side = side
+        self.symbol = symbol
+        self.tp = tp
+        self.sl = sl
+        self.first_deal = (time, deal_ticket)
+        self.open_time = time
+        self.close_time = time
+        self.in_volume = self.in_notional = 0.0
+        self.out_volume = self.out_notional = 0.0
+        self.profit = self.commission = self.swap = 0.0
+
+    @property
+    def open_volume(self) -> float:
+        return self.in_volume - self.out_volume
+
+    def add_in(self, volume: float, price: float):
+        self.in_volume += volume
+        self.in_notional += volume * price
+
+    def add_out(self, volume: float, price: float, time: datetime, profit: float):
+        self.out_volume += volume
+        self.out_notional += volume * price
+        self.close_time = time
+        self.profit += profit
+
+
+def find_orphaned_positions(deals: DealColumns) -> List[int]:
+    """Positions with closing deals but no opening deal in the batch"""
+    trade = np.isin(deals.type, TRADE_DEAL_TYPES) & (deals.position_id != 0)
+    opened = deals.position_id[trade & (deals.entry == DEAL_ENTRY_IN)]
+    closed = deals.position_id[trade & np.isin(deals.entry, CLOSING_ENTRIES)]
+    return np.setdiff1d(closed, opened).tolist()
+
+
+def reconstruct_positions(deals: DealColumns) -> PositionColumns:
+    """
+    Pair MT5 deals into closed positions in one pass over the deals in
+    (time, ticket) order.
+
+    Deals are grouped by position_id. IN deals add volume, OUT / OUT_BY deals
+    remove it (partial closes accumulate), and the position is emitted once
+    its volume is back to zero, with volume-weighted open/close prices, first
+    IN / last OUT times, the summed profit and all commission and swap.
+    An INOUT deal (netting reversal) closes the current volume and opens the
+    rest in the new direction as a separate position keyed by that deal's
+    ticket; otherwise a position is keyed by its position_id.
+
+    Positions still open at the end are not emitted; resume_point on the
+    result marks where the next sync must start to see them close.
+    """
+    if len(deals) == 0:
+        return PositionColumns.empty()
+
+    # Drop repeated tickets (e.g. re-fetched opening deals), then sort by time
+    _, first_index = np.unique(deals.ticket, return_index=True)
+    deals = deals.take(first_index)
+    deals = deals.take(np.lexsort((deals.ticket, deals.time)))
+
+    open_legs: Dict[int, _Leg] = {}
+    closed: List[_Leg] = []
+    unmatched = 0
+
+    for ticket, position_id, symbol, deal_type, entry, volume, price, commission, swap, profit, tp, sl, time in zip(
+            deals.ticket.tolist(), deals.position_id.tolist(), deals.symbol.tolist(), deals.type.tolist(),
+            deals.entry.tolist(), deals.volume.tolist(), deals.price.tolist(), deals.commission.tolist(),
+            deals.swap.tolist(), deals.profit.tolist(), deals.tp.tolist(), deals.sl.tolist(), deals.time.tolist()):
+        if deal_type not in TRADE_DEAL_TYPES:
+            continue
+        side = 'buy' if deal_type == DEAL_TYPE_BUY else 'sell'
+        leg = open_legs.get(position_id)
+
+        if entry == DEAL_ENTRY_IN:
+            if leg is None:
+                leg = open_legs[position_id] = _Leg(position_id, side, symbol, time, ticket, tp, sl)
+            leg.add_in(volume, price)
+        elif leg is None:
+            # Opening deals are outside the fetched history
+            unmatched += 1
+            continue
+        elif entry == DEAL_ENTRY_INOUT:
+            closing = leg.open_volume
+            leg.add_out(closing, price, time, profit)
+            leg.commission += commission
+            leg.swap += swap
+            closed.append(leg)
+            del open_legs[position_id]
+            if volume - closing > VOLUME_EPSILON:
+                reversed_leg = open_legs[position_id] = _Leg(ticket, side, symbol, time, ticket, tp, sl)
+                reversed_leg.add_in(volume - closing, price)
+            continue
+        else:
+            leg.add_out(volume, price, time, profit)
+
+        leg.commission += commission
+        leg.swap += swap
+        if entry in CLOSING_ENTRIES and leg.open_volume <= VOLUME_EPSILON:
+            closed.append(leg)
+            del open_legs[position_id]
+
+    if unmatched:
+        logger.warning(f"Skipped {unmatched} closing deals whose position was opened before the fetched history")
+
+    newest = (deals.time[-1].item(), int(deals.ticket[-1]))
+    resume_point: Optional[Tuple[datetime, int]] = (
+        min(leg.first_deal for leg in open_legs.values()) if open_legs else newest
+    )
+
+    if not closed:
+        positions = PositionColumns.empty()
+        positions.resume_point = resume_point
+        return positions
+
+    return PositionColumns(
+        resume_point=resume_point,
+        ticket=[leg.ticket for leg in closed],
+        symbol=[leg.symbol for leg in closed],
+        type=[leg.side for leg in closed],
+        volume=[leg.in_volume for leg in closed],
+        price_open=[leg.in_notional / leg.in_volume if leg.in_volume else 0.0 for leg in closed],
+        price_close=[leg.out_notional / leg.out_volume if leg.out_volume else 0.0 for leg in closed],
+        tp=[leg.tp for leg in closed],
+        sl=[leg.sl for leg in closed],
+        profit=[leg.profit for leg in closed],
+        commission=[leg.commission for leg in closed],
+        swap=[leg.swap for leg in closed],
+        open_time=[leg.open_time for leg in closed],
+        close_time=[leg.close_time for leg in closed],
+    )
@@ -0,0 +1,46 @@
+from typing import Any, Dict, List, Optional
+
+
+class RankIndex:
+    """
+    Precomputed ranking for one (sort_by, time_period) leaderboard.
+
+    Holds the entries in rank order plus a user_id -> position map, so a user's
+    rank, percentile and neighbours are looked up without re-sorting.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], sort_by: str):
+        # Sort by specified metric (descending); ties keep their input order
+        self.entries = sorted(entries, key=lambda x: x[sort_by], reverse=True)
+        self.positions: Dict[str, int] = {}
+        
+        # Add rank
+        for idx, entry in enumerate(self.entries):
+            entry['rank'] = idx + 1
+            self.positions[entry['user_id']] = idx
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        return self.entries[:limit]
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        position = self.positions.get(user_id)
+        return self.entries[position] if position is not None else None
+
+    def nearby(self, user_id: str, count: int) -> List[Dict[str, Any]]:
+        """Entries up to `count` ranks above and below the user, excluding the user"""
+        position = self.positions.get(user_id)
+        if position is None or count <= 0:
+            return []
+        start = max(position - count, 0)
+        window = self.entries[start:position + count + 1]
+        return [entry for entry in window if entry['user_id'] != user_id]
+
+    def percentile(self, user_id: str) -> float:
+        total = len(self.entries)
+        position = self.positions.get(user_id)
+        if position is None or total == 0:
+            return 0.0
+        return (total - (position + 1)) / total * 100
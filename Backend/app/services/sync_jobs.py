@@ -0,0 +1,191 @@
+import os
+import threading
+import uuid
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from app.database import SessionLocal
+from app.crud.mt5_crud import get_mt5_credentials, get_sync_start, update_sync_state
+from app.services.mt5_service import describe_mt5_error, SYNC_OVERLAP
+from app.services.mt5_broker import mt5_terminal_broker
+from app.services.trade_ingest import ingest_mt5_deals
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Concurrent MT5 syncs per process
+MT5_SYNC_WORKERS = int(os.getenv("MT5_SYNC_WORKERS", 2))
+
+# Finished jobs stay queryable for this long
+JOB_RETENTION = timedelta(hours=1)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class SyncJob:
+    """One MT5 history sync for a user's account, with live progress counts"""
+
+    def __init__(self, user_id: str, account: str, server: str, full_resync: bool):
+        self.job_id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.account = account
+        self.server = server
+        self.full_resync = full_resync
+
+        self.status = QUEUED
+        self.stage = "queued"
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+        self.total_fetched = 0
+        self.newly_saved = 0
+        self.already_exist = 0
+        self.errors = 0
+        self.sync_from: Optional[datetime] = None
+
+        self.error: Optional[str] = None
+        self.error_status_code: Optional[int] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "user_id": self.user_id,
+            "account": self.account,
+            "server": self.server,
+            "status": self.status,
+            "stage": self.stage,
+            "full_resync": self.full_resync,
+            "sync_from": self.sync_from.isoformat() if self.sync_from else None,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "progress": {
+                "total_fetched": self.total_fetched,
+                "newly_saved": self.newly_saved,
+                "already_exist": self.already_exist,
+                "errors": self.errors,
+            },
+            "error": self.error,
+            "error_status_code": self.error_status_code,
+        }
+
+
+class SyncJobManager:
+    """
+    Runs MT5 syncs on a worker pool.
+
+    At most one job per (account, server) is queued or running at a time;
+    submitting again while one is active returns the active job.
+    """
+
+    def __init__(self, max_workers: int = MT5_SYNC_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mt5-sync")
+        self._jobs: Dict[str, SyncJob] = {}
+        self._active_by_account: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: str, account: str, server: str, full_resync: bool = False) -> Tuple[SyncJob, bool]:
+        """Enqueue a sync; returns (job, created) where created is False for a deduplicated request"""
+        key = (str(account), server)
+        with self._lock:
+            self._prune()
+            active_id = self._active_by_account.get(key)
+            if active_id and self._jobs[active_id].is_active:
+                return self._jobs[active_id], False
+
+            job = SyncJob(user_id, str(account), server, full_resync)
+            self._jobs[job.job_id] = job
+            self._active_by_account[key] = job.job_id
+
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[SyncJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = datetime.now() - JOB_RETENTION
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if not job.is_active and job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _run(self, job: SyncJob):
+        job.status = RUNNING
+        job.started_at = datetime.now()
+        try:
+            with SessionLocal() as db:
+                run_mt5_sync(db, job)
+            job.status = COMPLETED
+            job.stage = "completed"
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"MT5 sync job {job.job_id} failed: {error_msg}")
+            logger.error(traceback.format_exc())
+            job.status = FAILED
+            if job.error is None:
+                job.error = error_msg
+                job.error_status_code = 500
+        finally:
+            job.finished_at = datetime.now()
+            with self._lock:
+                key = (job.account, job.server)
+                if self._active_by_account.get(key) == job.job_id:
+                    del self._active_by_account[key]
+
+
+def run_mt5_sync(db, job: SyncJob):
+    """Fetch new deals for the job's account and save them, updating job progress as it goes"""
+    credentials = get_mt5_credentials(db, job.user_id)
+    if not credentials:
+        job.error, job.error_status_code = "No MT5 credentials found", 404
+        raise Exception(job.error)
+
+    # Only ask MT5 for deals after the last sync's watermark, unless a full resync is requested
+    job.sync_from = get_sync_start(db, credentials, SYNC_OVERLAP, job.full_resync)
+
+    job.stage = "fetching"
+    try:
+        trades = mt5_terminal_broker.fetch_trades(
+            account=int(credentials.account),
+            password=credentials.password,
+            server=credentials.server,
+            days=90,
+            date_from=job.sync_from,
+            columnar=True
+        )
+    except Exception as mt5_error:
+        job.error_status_code, job.error = describe_mt5_error(str(mt5_error))
+        raise
+
+    job.total_fetched = len(trades)
+
+    def on_progress(counts: Dict[str, int]):
+        job.newly_saved = counts["saved"]
+        job.already_exist = counts["skipped"]
+        job.errors = counts["errors"]
+
+    # Validate, dedupe and insert all closed positions in bulk
+    job.stage = "saving"
+    counts = ingest_mt5_deals(db, job.user_id, trades, str(credentials.account), credentials.server,
+                              on_progress=on_progress)
+    on_progress(counts)
+    update_sync_state(db, credentials, trades.resume_point)
+
+
+# Process-wide manager used by the API
+sync_job_manager = SyncJobManager()
@@ -0,0 +1,175 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, literal, bindparam, Integer, BigInteger, String, Float, DateTime
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import logging
+import numpy as np
+
+from app.models.trade import Trade
+from app.crud.stats_crud import record_trades
+from app.crud.trade_crud import get_existing_tickets
+from app.crud.trade_no_crud import allocate_trade_nos
+from app.services.deal_columns import PositionColumns
+from app.services.mt5_service import calculate_profit_loss
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Deals per INSERT statement / dedupe query
+INGEST_CHUNK_SIZE = 1000
+
+
+def ingest_mt5_deals(db: Session, user_id: str, deals: Union[PositionColumns, List[Dict[str, Any]]],
+                     account: str, server: str,
+                     on_progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+    """
+    Save closed MT5 positions from one account for a user in bulk.
+
+    Positions are handled column-wise (a PositionColumns from
+    fetch_mt5_trades, or dicts converted to one): duplicates within the
+    batch and tickets already stored for the account
+    (one indexed IN query per chunk) are dropped, trade numbers are allocated
+    for the whole batch, and each chunk is inserted by a single
+    INSERT ... SELECT unnest(...) ON CONFLICT DO NOTHING that takes one array
+    parameter per column. Rollups are updated in the same transaction.
+
+    on_progress, if given, receives the running counts after each chunk.
+    Returns saved/skipped/error counts.
+    """
+    if isinstance(deals, PositionColumns):
+        columns, error_count = deals, 0
+    else:
+        columns, error_count = _dicts_to_columns(deals)
+    saved_count, skipped_count = 0, 0
+
+    # 1. Drop duplicate tickets within the batch, keeping the first occurrence
+    _, first_index = np.unique(columns.ticket, return_index=True)
+    skipped_count += len(columns) - len(first_index)
+    columns = columns.take(np.sort(first_index))
+    if len(columns) == 0:
+        return {"saved": saved_count, "skipped": skipped_count, "errors": error_count}
+
+    try:
+        # 2. Set-based dedupe against tickets already stored for this account
+        is_new = np.ones(len(columns), dtype=bool)
+        for start in range(0, len(columns), INGEST_CHUNK_SIZE):
+            chunk_tickets = columns.ticket[start:start + INGEST_CHUNK_SIZE]
+            existing = get_existing_tickets(db, chunk_tickets.tolist(), account, server)
+            if existing:
+                is_new[start:start + INGEST_CHUNK_SIZE] = ~np.isin(chunk_tickets, list(existing))
+        skipped_count += int((~is_new).sum())
+        columns = columns.take(is_new)
+
+        # 3. Allocate trade numbers for the whole batch
+        trade_nos = np.array(allocate_trade_nos(db, len(columns)), dtype=np.int64)
+
+        # 4. One INSERT per chunk; tickets stored concurrently are skipped by the unique index
+        inserted = []
+        for start in range(0, len(columns), INGEST_CHUNK_SIZE):
+            chunk = columns.take(slice(start, start + INGEST_CHUNK_SIZE))
+            result = db.execute(_insert_chunk(user_id, account, server, chunk,
+                                              trade_nos[start:start + INGEST_CHUNK_SIZE]))
+            chunk_inserted = result.all()
+            inserted.extend(chunk_inserted)
+            skipped_count += len(chunk) - len(chunk_inserted)
+            if on_progress:
+                on_progress({"saved": len(inserted), "skipped": skipped_count, "errors": error_count})
+
+        record_trades(db, (tuple(row) for row in inserted))
+        db.commit()
+        saved_count = len(inserted)
+    except Exception:
+        db.rollback()
+        raise
+
+    return {"saved": saved_count, "skipped": skipped_count, "errors": error_count}
+
+
+def _insert_chunk(user_id: str, account: str, server: str, chunk: PositionColumns, trade_nos: np.ndarray):
+    """INSERT ... SELECT unnest(:col1), unnest(:col2), ... for one chunk of positions"""
+    def unnest(name: str, values: np.ndarray, sa_type):
+        return func.unnest(bindparam(name, values.tolist(), type_=ARRAY(sa_type))).label(name)
+
+    net = chunk.net
+    profit_amount, loss_amount = calculate_profit_loss(net)
+    source = select(
+        literal(user_id, String).label('user_id'),
+        unnest('trade_no', trade_nos, Integer),
+        unnest('broker_ticket', chunk.ticket, BigInteger),
+        literal(account, String).label('broker_account'),
+        literal(server, String).label('broker_server'),
+        unnest('symbol', chunk.symbol, String),
+        unnest('volume', chunk.volume, Float),
+        unnest('price_open', chunk.price_open, Float),
+        unnest('price_close', chunk.price_close, Float),
+        unnest('type', chunk.type, String),
+        unnest('take_profit', chunk.tp, Float),
+        unnest('stop_loss', chunk.sl, Float),
+        unnest('profit_amount', profit_amount, Float),
+        unnest('loss_amount', loss_amount, Float),
+        unnest('net_profit', net, Float),
+        unnest('commission', chunk.commission, Float),
+        unnest('swap', chunk.swap, Float),
+        literal("Fetched from MT5", String).label('reason'),
+        literal("To be analyzed", String).label('mistake'),
+        unnest('open_time', chunk.open_time, DateTime),
+        unnest('close_time', chunk.close_time, DateTime),
+    )
+    return insert(Trade).from_select(
+        [column.name for column in source.selected_columns], source
+    ).on_conflict_do_nothing(
+        index_elements=['broker_account', 'broker_server', 'broker_ticket']
+    ).returning(
+        Trade.user_id, Trade.close_time, Trade.net_profit, Trade.profit_amount, Trade.loss_amount
+    )
+
+
+def _dicts_to_columns(deals: List[Dict[str, Any]]) -> Tuple[PositionColumns, int]:
+    """Validate position dicts (the fetch_mt5_trades list shape) into columns; returns (columns, invalid count)"""
+    values = {name: [] for name in ('ticket', 'symbol', 'volume', 'price_open', 'price_close', 'type',
+                                    'tp', 'sl', 'profit', 'commission', 'swap', 'open_time', 'close_time')}
+    error_count = 0
+    for deal in deals:
+        try:
+            row = _validate_deal(deal)
+        except Exception as e:
+            error_count += 1
+            logger.warning(f"Skipping invalid deal {deal.get('ticket', 'unknown') if isinstance(deal, dict) else deal}: {str(e)}")
+            continue
+        for name, value in zip(values, row):
+            values[name].append(value)
+
+    if not values['ticket']:
+        return PositionColumns.empty(), error_count
+    return PositionColumns(**values), error_count
+
+
+def _validate_deal(deal: Dict[str, Any]) -> tuple:
+    """Check one position dict and return its values in _dicts_to_columns order"""
+    if 'ticket' not in deal:
+        raise ValueError("missing ticket")
+
+    deal_time = deal.get('time') or datetime.now()
+    open_time = deal.get('open_time') or deal_time
+    close_time = deal.get('close_time') or deal_time
+    for value in (open_time, close_time):
+        if not isinstance(value, datetime):
+            raise ValueError(f"invalid time {value!r}")
+
+    return (
+        int(deal['ticket']),
+        str(deal.get('symbol', 'UNKNOWN')),
+        float(deal.get('volume', 0.0)),
+        float(deal.get('price_open', 0.0)),
+        float(deal.get('price_close', 0.0)),
+        str(deal.get('type', 'unknown')),
+        float(deal.get('tp', 0.0) or 0.0),
+        float(deal.get('sl', 0.0) or 0.0),
+        float(deal.get('profit', 0.0) or 0.0),
+        float(deal.get('commission', 0.0) or 0.0),
+        float(deal.get('swap', 0.0) or 0.0),
+        open_time,
+        close_time,
+    )
@@ -0,0 +1,73 @@
+"""
+Load-test the MT5 fetch and ingest path against the in-process fake terminal.
+Runs on Linux without MetaTrader5 installed.
+
+    python load_test_mt5.py --accounts 20 --deals 5000
+    python load_test_mt5.py --accounts 5 --deals 5000 --ingest-user <user_id>
+
+--ingest-user saves every fetched history for that user (needs the database
+and writes real rows - use a scratch user).
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.mt5_client import FakeMT5Client, set_mt5_client
+from app.services.mt5_broker import mt5_terminal_broker
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+def load_test_mt5(accounts: int, deals: int, latency_ms: float, ipc_timeout_rate: float,
+                  requests_per_account: int, ingest_user: str = None):
+    set_mt5_client(FakeMT5Client(deals_per_account=deals, latency=latency_ms / 1000,
+                                 ipc_timeout_rate=ipc_timeout_rate))
+
+    jobs = [(100000 + i, "Fake-Server") for i in range(accounts) for _ in range(requests_per_account)]
+    results, failures = [], 0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(len(jobs), 32)) as pool:
+        futures = [pool.submit(mt5_terminal_broker.fetch_trades, account, "password", server, 365, None, True)
+                   for account, server in jobs]
+        for future, (account, server) in zip(futures, jobs):
+            try:
+                results.append((account, server, future.result()))
+            except Exception as e:
+                failures += 1
+                logger.warning(f"Fetch failed for {account}@{server}: {e}")
+    fetch_seconds = time.perf_counter() - started
+
+    total_positions = sum(len(positions) for _, _, positions in results)
+    print(f"📊 Fetched {total_positions} positions in {len(results)} requests ({failures} failed) "
+          f"in {fetch_seconds:.2f}s")
+    print(f"   Broker: {mt5_terminal_broker.metrics()}")
+
+    if ingest_user:
+        from app.database import SessionLocal
+        from app.services.trade_ingest import ingest_mt5_deals
+
+        started = time.perf_counter()
+        totals = {"saved": 0, "skipped": 0, "errors": 0}
+        with SessionLocal() as db:
+            for account, server, positions in results:
+                counts = ingest_mt5_deals(db, ingest_user, positions, str(account), server)
+                for key in totals:
+                    totals[key] += counts[key]
+        ingest_seconds = time.perf_counter() - started
+        print(f"💾 Ingested {totals} in {ingest_seconds:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--deals", type=int, default=1000, help="positions per account")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="per terminal call")
+    parser.add_argument("--ipc-timeout-rate", type=float, default=0.0, help="0-1, per terminal call")
+    parser.add_argument("--requests-per-account", type=int, default=1)
+    parser.add_argument("--ingest-user", default=None)
+    args = parser.parse_args()
+
+    load_test_mt5(args.accounts, args.deals, args.latency_ms, args.ipc_timeout_rate,
+                  args.requests_per_account, args.ingest_user)
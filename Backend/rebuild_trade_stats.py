@@ -0,0 +1,33 @@
+"""
+Rebuild the user_trade_stats and user_daily_stats rollup tables from the trades table.
+Safe to re-run at any time to repair drift (e.g. after manual SQL edits).
+"""
+
+from app.database import engine, Base, SessionLocal
+from app.models.user import User
+from app.models.trade import Trade
+from app.models.mt5_credentials import MT5Credentials
+from app.models.mt5_sync_state import MT5SyncState
+from app.models.user_trade_stats import UserTradeStats
+from app.models.user_daily_stats import UserDailyStats
+from app.crud.stats_crud import rebuild_all_stats
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def rebuild_trade_stats():
+    # Make sure the rollup table exists before filling it
+    Base.metadata.create_all(bind=engine)
+    
+    with SessionLocal() as db:
+        try:
+            count = rebuild_all_stats(db)
+            logger.info(f"Rebuilt trade stats for {count} users.")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error rebuilding trade stats: {e}")
+            raise
+
+if __name__ == "__main__":
+    rebuild_trade_stats()
@@ -0,0 +1,206 @@
+"""
+EXPLAIN the hot trade/user/login-history queries against a seeded dataset
+and fail (exit code 1) if any of them falls back to a sequential scan on
+the table it should reach through an index. The queries are the ones the
+app's crud/route functions actually send, captured while calling them.
+
+Seeding happens inside a transaction that is rolled back at the end, so it
+is safe to run against a development database. Run it from Backend/ with
+the same DB_* settings (.env) as the app, after add_trade_access_indexes.py:
+
+    python verify_query_plans.py
+
+Exits 0 when every plan uses its indexes and 1 otherwise (e.g. a query
+seq-scanning trades), so it can gate a CI job or a deploy.
+"""
+
+from app.database import engine
+from app.models.user import User
+# Imported so every relationship resolves when the mappers configure
+from app.models.mt5_credentials import MT5Credentials
+from app.models.mt5_sync_state import MT5SyncState
+from app.crud.pagination import encode_cursor
+from app.crud.stats_crud import refresh_daily_stats
+from app.crud.trade_crud import get_latest_opened_trade, get_trades, get_trades_page
+from app.crud.user_crud import get_users_with_stats
+from app.routes.admin_system import _count_platform, get_login_logs
+from app.routes.admin_trades import get_all_trades
+from app.routes.admin_users import get_user_login_history
+from app.services.activity_service import _count_buckets
+from fastapi import Response
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import json
+import sys
+
+# Seeded dataset size
+SEED_USERS = 500
+SEED_TRADES_PER_USER = 200
+SEED_LOGINS_PER_USER = 40
+SEED_USER = "qp-user-1"
+
+# Passed where a route expects the current admin
+ADMIN = User(user_id="qp-admin", role="admin")
+
+# name -> (tables that must not be seq-scanned, call into the app's own query
+# code); every SELECT the call issues is EXPLAINed exactly as the app sends it.
+# Parameters come from query_params()
+HOT_QUERIES = {
+    "get_trades (user's trades)": (
+        ("trades",),
+        lambda db, p: get_trades(db, SEED_USER),
+    ),
+    "get_trades_page (user, keyset page)": (
+        ("trades",),
+        lambda db, p: get_trades_page(db, user_id=SEED_USER, cursor=encode_cursor(p["since"], 0)),
+    ),
+    "mt5-status (latest trade by open_time)": (
+        ("trades",),
+        lambda db, p: get_latest_opened_trade(db, SEED_USER),
+    ),
+    "admin get_all_trades (user + date range)": (
+        ("trades",),
+        lambda db, p: get_all_trades(user_id=SEED_USER, start_date=p["since"].date(), end_date=None,
+                                     skip=0, limit=50, cursor=None, db=db, admin=ADMIN),
+    ),
+    "admin trade list (newest first)": (
+        ("trades",),
+        lambda db, p: get_trades_page(db, limit=50),
+    ),
+    "system stats (estimated totals, trades_24h)": (
+        ("trades",),
+        lambda db, p: _count_platform(db, estimate=True),
+    ),
+    "daily stats refresh (user + day)": (
+        ("trades",),
+        lambda db, p: refresh_daily_stats(db, SEED_USER, p["day_start"].date()),
+    ),
+    "admin user list by role": (
+        ("users",),
+        lambda db, p: get_users_with_stats(db, role="admin"),
+    ),
+    "activity (trades, signups, logins by day)": (
+        ("trades", "users", "login_history"),
+        lambda db, p: _count_buckets(db, "day", p["day_ago"], p["now"]),
+    ),
+    "admin login log (keyset page)": (
+        ("login_history",),
+        lambda db, p: get_login_logs(Response(), skip=0, limit=50, cursor=encode_cursor(p["since"], 0),
+                                     status=None, user=None, ip=None, db=db, admin=ADMIN),
+    ),
+    "user login history": (
+        ("login_history",),
+        lambda db, p: get_user_login_history(SEED_USER, db=db, admin=ADMIN),
+    ),
+}
+
+def query_params() -> dict:
+    now = datetime.utcnow()
+    day_start = (now - timedelta(days=30)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        "now": now,
+        "since": now - timedelta(days=30),
+        "day_ago": now - timedelta(days=1),
+        "day_start": day_start,
+    }
+
+def captured_selects(connection, call) -> list:
+    """(SQL, parameters) of every SELECT `call` sends through `connection`, as compiled by the dialect"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        with Session(bind=connection) as db:
+            call(db)
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+    return statements
+
+def seed(connection):
+    """Users (a few admins), a year of trades per user and their logins"""
+    connection.execute(text("""
+        INSERT INTO users (user_id, first_name, email, password, role, is_active, created_at)
+        SELECT 'qp-user-' || n, 'Plan ' || n, 'qp-user-' || n || '@example.invalid', 'x',
+               CASE WHEN n % 100 = 0 THEN 'admin' ELSE 'user' END, true,
+               now() - (random() * interval '365 days')
+        FROM generate_series(1, :users) AS n
+    """), {"users": SEED_USERS})
+
+    # Negative trade numbers cannot collide with real ones
+    connection.execute(text("""
+        INSERT INTO trades (user_id, trade_no, symbol, volume, price_open, price_close, type,
+                            take_profit, stop_loss, profit_amount, loss_amount, net_profit,
+                            reason, mistake, open_time, close_time)
+        SELECT 'qp-user-' || (n % :users + 1), -n, 'EURUSD', 0.1, 1.1, 1.1, 'buy', 0, 0,
+               greatest(p, 0), greatest(-p, 0), p, 'seed', 'seed',
+               t - interval '1 hour', t
+        FROM (
+            SELECT n, (random() * 200 - 100)::numeric(10, 2)::float AS p,
+                   now() - (random() * interval '365 days') AS t
+            FROM generate_series(1, :trades) AS n
+        ) AS s
+    """), {"users": SEED_USERS, "trades": SEED_USERS * SEED_TRADES_PER_USER})
+
+    connection.execute(text("""
+        INSERT INTO login_history (user_id, ip_address, status, timestamp)
+        SELECT 'qp-user-' || (n % :users + 1), '10.0.0.' || (n % 250), 'success',
+               now() - (random() * interval '365 days')
+        FROM generate_series(1, :logins) AS n
+    """), {"users": SEED_USERS, "logins": SEED_USERS * SEED_LOGINS_PER_USER})
+
+    for table in ("users", "trades", "login_history"):
+        connection.execute(text(f"ANALYZE {table}"))
+
+def seq_scanned_tables(plan: dict) -> set:
+    """Relations read by a Seq Scan anywhere in an EXPLAIN (FORMAT JSON) plan"""
+    tables = set()
+    if plan.get("Node Type") == "Seq Scan":
+        tables.add(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        tables |= seq_scanned_tables(child)
+    return tables
+
+def verify_query_plans() -> bool:
+    failed = []
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            print(f"🌱 Seeding {SEED_USERS} users, {SEED_USERS * SEED_TRADES_PER_USER} trades "
+                  f"and {SEED_USERS * SEED_LOGINS_PER_USER} logins (rolled back afterwards)...")
+            seed(connection)
+
+            params = query_params()
+            for name, (tables, call) in HOT_QUERIES.items():
+                statements = captured_selects(connection, lambda db: call(db, params))
+                if not statements:
+                    # A check that runs no query would pass without testing anything
+                    failed.append(name)
+                    print(f"❌ {name}: no query was sent")
+                for statement, parameters in statements:
+                    raw = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+                    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+                    scanned = seq_scanned_tables(plan) & set(tables)
+                    if scanned:
+                        if name not in failed:
+                            failed.append(name)
+                        print(f"❌ {name}: sequential scan on {', '.join(sorted(scanned))}")
+                        print(statement)
+                        print(json.dumps(plan, indent=2))
+                    else:
+                        print(f"✅ {name}: {plan['Node Type']}")
+        finally:
+            transaction.rollback()
+
+    if failed:
+        print(f"❌ {len(failed)} of {len(HOT_QUERIES)} checks failed: {', '.join(failed)}")
+    else:
+        print(f"✅ All {len(HOT_QUERIES)} queries use their indexes")
+    return not failed
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_query_plans() else 1)
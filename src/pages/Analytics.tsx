@@ -9,14 +9,20 @@ import api from "@/lib/api";
 const Analytics = () => {
   const { user } = useAuth();
   const [trades, setTrades] = useState<any[]>([]);
+  const [equityCurve, setEquityCurve] = useState<{ time: string; equity: number }[]>([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetchTrades = async () => {
       if (user?.user_id) {
         try {
-          const response = await api.get(`/trades/user/${user.user_id}`);
+          const [response, equityResponse] = await Promise.all([
+            api.get(`/trades/user/${user.user_id}`),
+            // Downsampled server-side over the full history, so the chart stays cheap
+            api.get(`/trades/analytics/${user.user_id}/equity`, { params: { points: 500 } })
+          ]);
           setTrades(response.data);
+          setEquityCurve(equityResponse.data.series || []);
         } catch (error) {
           console.error("Error fetching trades for analytics:", error);
         } finally {
@@ -28,17 +34,11 @@ const Analytics = () => {
   }, [user?.user_id]);
 
   // Derived Analytics using Real Data
-  // 1. Equity Curve
-  let runningEquity = 0; // Assume starting at 0 or base balance. Showing relative growth.
-  const equityData = trades
-    .sort((a, b) => new Date(a.close_time).getTime() - new Date(b.close_time).getTime())
-    .map(t => {
-      runningEquity += t.net_profit;
-      return {
-        date: new Date(t.close_time).toLocaleDateString(),
-        equity: parseFloat(runningEquity.toFixed(2))
-      };
-    });
+  // 1. Equity Curve (cumulative P&L from /trades/analytics/{user_id}/equity)
+  const equityData = equityCurve.map(point => ({
+    date: new Date(point.time).toLocaleDateString(),
+    equity: point.equity
+  }));
 
   // 2. Win/Loss
   const winningTrades = trades.filter(t => t.net_profit > 0).length;
@@ -9,16 +9,27 @@ import api from "@/lib/api";
 const Mistakes = () => {
   const { user } = useAuth();
   const [mistakes, setMistakes] = useState<any[]>([]);
+  const [mistakeCategories, setMistakeCategories] = useState<any[]>([]);
+  const [totalLoss, setTotalLoss] = useState(0);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetchMistakes = async () => {
       if (user?.user_id) {
         try {
-          const response = await api.get(`/trades/user/${user.user_id}`);
-          // Filter trades that have a mistake recorded
-          const mistakeTrades = response.data.filter((t: any) => t.mistake && t.mistake.trim() !== "");
-          setMistakes(mistakeTrades);
+          // Categories, counts and loss totals are aggregated server-side
+          const response = await api.get(`/trades/mistakes/${user.user_id}`, { params: { examples: 5 } });
+          const categories = response.data.categories || [];
+          setMistakeCategories(
+            categories.map((c: any) => ({ name: c.name, count: c.count, color: "bg-primary/10 text-primary" }))
+          );
+          setTotalLoss(response.data.total_loss || 0);
+          // Newest examples across all categories
+          setMistakes(
+            categories
+              .flatMap((c: any) => c.examples)
+              .sort((a: any, b: any) => new Date(b.close_time).getTime() - new Date(a.close_time).getTime())
+          );
         } catch (error) {
           console.error("Error fetching mistakes:", error);
         } finally {
@@ -29,19 +40,6 @@ const Mistakes = () => {
     fetchMistakes();
   }, [user?.user_id]);
 
-  // Calculate categories dynamically
-  const mistakeCategories = mistakes.reduce((acc: any[], trade) => {
-    const type = trade.mistake; // In real app, might want to categorize better
-    const existing = acc.find(c => c.name === type);
-    if (existing) {
-      existing.count++;
-    } else {
-      acc.push({ name: type, count: 1, color: "bg-primary/10 text-primary" });
-    }
-    return acc;
-  }, []);
-
-  const totalLoss = mistakes.reduce((sum, t) => sum + (t.loss_amount || 0), 0);
   return (
     <div className="min-h-screen">
       <Header />
@@ -101,7 +99,7 @@ const Mistakes = () => {
               <div className="space-y-4">
                 {mistakes.map((mistake, i) => (
                   <div
-                    key={mistake.ticket || i}
+                    key={mistake.trade_no || i}
                     className="glass-card p-6 cursor-pointer hover:border-primary/30 opacity-0 animate-fade-up"
                     style={{ animationDelay: `${0.35 + i * 0.05}s` }}
                   >
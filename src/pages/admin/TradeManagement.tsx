@@ -43,12 +43,19 @@ const TradeManagement = () => {
 
     const fetchInitialData = async () => {
         try {
-            const [usersResponse] = await Promise.all([
-                api.get("/api/admin/users"),
-            ]);
-            // Filter out admin users
-            const filteredUsers = usersResponse.data.filter((user: any) => user.role !== 'admin');
-            setUsers(filteredUsers);
+            // The user list is paged; collect every non-admin user for the picker
+            const pageSize = 1000;
+            const allUsers: any[] = [];
+            let total = Infinity;
+            while (allUsers.length < total) {
+                const usersResponse = await api.get("/api/admin/users", {
+                    params: { role: "user", sort_by: "name", order: "asc", skip: allUsers.length, limit: pageSize },
+                });
+                allUsers.push(...usersResponse.data);
+                total = Number(usersResponse.headers["x-total-count"] ?? allUsers.length);
+                if (usersResponse.data.length === 0) break;
+            }
+            setUsers(allUsers);
         } catch (error) {
             console.error("Failed to fetch initial data", error);
         }
@@ -19,7 +19,10 @@ import {
     ShieldOff,
     ShieldCheck,
     KeyRound,
-    Edit
+    Edit,
+    ArrowUpDown,
+    ChevronLeft,
+    ChevronRight
 } from "lucide-react";
 import {
     DropdownMenu,
@@ -43,20 +46,46 @@ interface User {
     created_at?: string;
 }
 
+type SortKey = "name" | "role" | "is_active" | "joined_at";
+
+const PAGE_SIZE = 50;
+
 const UserManagement = () => {
     const [users, setUsers] = useState<User[]>([]);
+    const [total, setTotal] = useState(0);
     const [loading, setLoading] = useState(true);
     const [searchTerm, setSearchTerm] = useState("");
+    const [roleFilter, setRoleFilter] = useState("all");
+    const [sortBy, setSortBy] = useState<SortKey>("joined_at");
+    const [order, setOrder] = useState<"asc" | "desc">("desc");
+    const [page, setPage] = useState(0);
     const { toast } = useToast();
 
+    // A new filter or sort starts again from the first page
+    useEffect(() => {
+        setPage(0);
+    }, [searchTerm, roleFilter, sortBy, order]);
+
     useEffect(() => {
-        fetchUsers();
-    }, []);
+        // Search runs server-side; wait for typing to pause
+        const timer = setTimeout(fetchUsers, 300);
+        return () => clearTimeout(timer);
+    }, [searchTerm, roleFilter, sortBy, order, page]);
 
     const fetchUsers = async () => {
         try {
-            const response = await api.get("/api/admin/users");
+            const response = await api.get("/api/admin/users", {
+                params: {
+                    search: searchTerm || undefined,
+                    role: roleFilter !== "all" ? roleFilter : undefined,
+                    sort_by: sortBy,
+                    order,
+                    skip: page * PAGE_SIZE,
+                    limit: PAGE_SIZE,
+                },
+            });
             setUsers(response.data);
+            setTotal(Number(response.headers["x-total-count"] ?? response.data.length));
         } catch (error) {
             toast({
                 variant: "destructive",
@@ -68,6 +97,26 @@ const UserManagement = () => {
         }
     };
 
+    const handleSort = (key: SortKey) => {
+        if (key === sortBy) {
+            setOrder(order === "asc" ? "desc" : "asc");
+        } else {
+            setSortBy(key);
+            setOrder(key === "joined_at" ? "desc" : "asc");
+        }
+    };
+
+    const sortableHead = (key: SortKey, label: string) => (
+        <TableHead>
+            <Button variant="ghost" size="sm" className="-ml-3" onClick={() => handleSort(key)}>
+                {label}
+                <ArrowUpDown className={`ml-2 h-4 w-4 ${sortBy === key ? "" : "text-muted-foreground"}`} />
+            </Button>
+        </TableHead>
+    );
+
+    const pageCount = Math.max(1, Math.ceil(total / PAGE_SIZE));
+
     const handleStatusToggle = async (userId: string, currentStatus: boolean) => {
         try {
             await api.patch(`/api/admin/users/${userId}/status`, { is_active: !currentStatus });
@@ -78,23 +127,29 @@ const UserManagement = () => {
         }
     };
 
-    const filteredUsers = users.filter(user =>
-        (user.name || "").toLowerCase().includes(searchTerm.toLowerCase()) ||
-        (user.email || "").toLowerCase().includes(searchTerm.toLowerCase())
-    );
-
     return (
         <AdminLayout>
             <div className="flex justify-between items-center mb-6">
                 <h1 className="text-2xl font-bold">User Management</h1>
-                <div className="relative w-64">
-                    <Search className="absolute left-2 top-2.5 h-4 w-4 text-muted-foreground" />
-                    <Input
-                        placeholder="Search users..."
-                        className="pl-8"
-                        value={searchTerm}
-                        onChange={(e) => setSearchTerm(e.target.value)}
-                    />
+                <div className="flex items-center gap-2">
+                    <select
+                        className="h-10 rounded-md border border-input bg-background px-3 py-2 text-sm ring-offset-background focus:outline-none focus:ring-2 focus:ring-ring focus:ring-offset-2"
+                        value={roleFilter}
+                        onChange={(e) => setRoleFilter(e.target.value)}
+                    >
+                        <option value="all">All Roles</option>
+                        <option value="user">User</option>
+                        <option value="admin">Admin</option>
+                    </select>
+                    <div className="relative w-64">
+                        <Search className="absolute left-2 top-2.5 h-4 w-4 text-muted-foreground" />
+                        <Input
+                            placeholder="Search users..."
+                            className="pl-8"
+                            value={searchTerm}
+                            onChange={(e) => setSearchTerm(e.target.value)}
+                        />
+                    </div>
                 </div>
             </div>
 
@@ -102,10 +157,10 @@ const UserManagement = () => {
                 <Table>
                     <TableHeader>
                         <TableRow>
-                            <TableHead>User</TableHead>
-                            <TableHead>Role</TableHead>
-                            <TableHead>Status</TableHead>
-                            <TableHead>Joined</TableHead>
+                            {sortableHead("name", "User")}
+                            {sortableHead("role", "Role")}
+                            {sortableHead("is_active", "Status")}
+                            {sortableHead("joined_at", "Joined")}
                             <TableHead className="text-right">Actions</TableHead>
                         </TableRow>
                     </TableHeader>
@@ -116,7 +171,7 @@ const UserManagement = () => {
                                     <Loader2 className="h-6 w-6 animate-spin mx-auto" />
                                 </TableCell>
                             </TableRow>
-                        ) : filteredUsers.map((user) => (
+                        ) : users.map((user) => (
                             <TableRow key={user.user_id}>
                                 <TableCell>
                                     <div className="flex flex-col">
@@ -166,6 +221,23 @@ const UserManagement = () => {
                     </TableBody>
                 </Table>
             </div>
+
+            <div className="flex items-center justify-between mt-4">
+                <span className="text-sm text-muted-foreground">
+                    {total === 0
+                        ? "No users"
+                        : `Showing ${page * PAGE_SIZE + 1}-${page * PAGE_SIZE + users.length} of ${total} users`}
+                </span>
+                <div className="flex items-center gap-2">
+                    <Button variant="outline" size="sm" disabled={page === 0} onClick={() => setPage(page - 1)}>
+                        <ChevronLeft className="h-4 w-4" /> Previous
+                    </Button>
+                    <span className="text-sm">Page {page + 1} of {pageCount}</span>
+                    <Button variant="outline" size="sm" disabled={page + 1 >= pageCount} onClick={() => setPage(page + 1)}>
+                        Next <ChevronRight className="h-4 w-4" />
+                    </Button>
+                </div>
+            </div>
         </AdminLayout>
     );
 };
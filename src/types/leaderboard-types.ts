@@ -21,6 +21,7 @@ export interface UserRankingResponse {
     user_rank: LeaderboardEntry;
     total_users: number;
     percentile: number;
+    nearby_ranks?: LeaderboardEntry[];
 }
 
 export type SortByMetric = 'net_profit' | 'win_rate' | 'total_trades' | 'profit_factor';